@@ -1,13 +1,49 @@
 """
 Markdown editor component with live preview pane.
 This will heavily depend on the chosen GUI toolkit.
-For PyQt6, this might involve a QTextEdit for Markdown input
+For PyQt6, this uses a QPlainTextEdit for Markdown input
 and a QWebEngineView (or QTextBrowser for simpler HTML) for preview.
 """
-from PyQt6.QtWidgets import QWidget, QTextEdit, QVBoxLayout, QSplitter
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer
+import time
+from PyQt6.QtWidgets import QWidget, QPlainTextEdit, QVBoxLayout, QSplitter
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QObject
 # from .viewer import MarkdownViewer # Assuming viewer.py has a preview widget
 
+class SignalThrottler(QObject):
+    """
+    Leading + trailing edge throttle.
+    The first throttle() call after a quiet period emits `triggered` immediately;
+    further calls within `interval` ms are coalesced into one trailing emission.
+    """
+    triggered = pyqtSignal()
+
+    def __init__(self, interval: int, parent=None):
+        super().__init__(parent)
+        self.interval = interval # milliseconds
+        self._last_emit = None # time.monotonic() of the last emission
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._emit)
+
+    def throttle(self):
+        """Requests an emission, either now (leading edge) or at the end of the interval."""
+        if self._timer.isActive():
+            return # A trailing emission is already scheduled
+        now = time.monotonic()
+        elapsed_ms = None if self._last_emit is None else (now - self._last_emit) * 1000
+        if elapsed_ms is None or elapsed_ms >= self.interval:
+            self._emit()
+        else:
+            self._timer.start(int(self.interval - elapsed_ms))
+
+    def cancel(self):
+        """Drops a pending trailing emission."""
+        self._timer.stop()
+
+    def _emit(self):
+        self._last_emit = time.monotonic()
+        self.triggered.emit()
+
 class MarkdownEditor(QWidget):
     """
     A widget combining a Markdown text editor and a live preview.
@@ -18,9 +54,9 @@ class MarkdownEditor(QWidget):
         super().__init__(parent)
         self.setObjectName("MarkdownEditor")
 
-        self.markdown_input = QTextEdit(self)
+        # QPlainTextEdit keeps a flat, line-based document instead of a rich-text model
+        self.markdown_input = QPlainTextEdit(self)
         self.markdown_input.setPlaceholderText("Enter your Markdown here...")
-        self.markdown_input.setAcceptRichText(False) # Ensure plain text
 
         # Preview pane (placeholder, will be replaced by actual viewer widget)
         # For now, let's use another QTextEdit to show it's distinct
@@ -39,35 +75,54 @@ class MarkdownEditor(QWidget):
         layout.setContentsMargins(0,0,0,0)
         self.setLayout(layout)
 
-        # Timer for delayed preview update (auto-save and preview)
-        self.update_timer = QTimer(self)
-        self.update_timer.setSingleShot(True)
-        self.update_timer.setInterval(1000) # 1 second delay
-        self.update_timer.timeout.connect(self._emit_content_changed)
+        # Throttle for preview update and auto-save: the first edit emits at once,
+        # the rest of a typing burst is coalesced into at most one emit per second
+        self.update_throttler = SignalThrottler(1000, self)
+        self.update_throttler.triggered.connect(self._emit_content_changed)
 
         self.markdown_input.textChanged.connect(self.on_text_changed)
 
+        # toPlainText() walks the whole document, so the text is cached per
+        # QTextDocument.revision() (which increases on every edit, undo and redo)
+        self._cached_text = ""
+        self._cached_revision = self.markdown_input.document().revision()
+        self._emitted_revision = self._cached_revision
+
     def on_text_changed(self):
         """Called when text in the markdown input changes."""
-        self.update_timer.start() # Restart timer
+        self.update_throttler.throttle()
 
     def _emit_content_changed(self):
-        """Emits the content_changed signal with current markdown."""
+        """Emits the content_changed signal with current markdown, unless nothing changed since the last emit."""
+        revision = self.markdown_input.document().revision()
+        if revision == self._emitted_revision:
+            return
+        self._emitted_revision = revision
         current_markdown = self.get_markdown_text()
         self.content_changed.emit(current_markdown)
         # The main GUI will catch this signal, update the preview, and trigger auto-save
 
     def set_markdown_text(self, text: str):
         """Sets the text in the Markdown input field."""
+        # Reselecting the same note would otherwise rebuild the document and drop the undo stack
+        if text == self.get_markdown_text():
+            return
         self.markdown_input.blockSignals(True) # Avoid triggering textChanged during set
         self.markdown_input.setPlainText(text)
         self.markdown_input.blockSignals(False)
+        # The new text is the baseline: it is not reported as a change
+        self._cached_text = text
+        self._cached_revision = self._emitted_revision = self.markdown_input.document().revision()
         # Optionally, trigger an immediate preview update if needed
         # self._emit_content_changed()
 
     def get_markdown_text(self) -> str:
         """Gets the current text from the Markdown input field."""
-        return self.markdown_input.toPlainText()
+        revision = self.markdown_input.document().revision()
+        if revision != self._cached_revision:
+            self._cached_text = self.markdown_input.toPlainText()
+            self._cached_revision = revision
+        return self._cached_text
 
     def set_font_size(self, size: int):
         """Sets the font size for the editor."""
@@ -88,7 +143,7 @@ if __name__ == '__main__':
     editor_widget = MarkdownEditor()
 
     def handle_content_change(md_text):
-        print("Editor content changed (debounced):")
+        print("Editor content changed (throttled):")
         # print(md_text[:100] + "...") # Print first 100 chars
         # In a real app, this would update the preview pane and auto-save
         # editor_widget.preview_pane.setMarkdown(md_text) # If preview pane supports setMarkdown
@@ -4,111 +4,496 @@ Manages file system operations for notes:
 - Reading and writing Markdown files.
 - Parsing and updating YAML front-matter.
 - Deleting notes.
+- Caching note metadata in a JSON sidecar so unchanged files are not re-parsed.
 """
 import os
-import glob
-from datetime import datetime
+import re
+import json
+import mmap
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 import yaml # From PyYAML
-from .utils import parse_yaml_front_matter, generate_yaml_front_matter, get_current_timestamp
+from .utils import (
+    parse_yaml_front_matter, generate_note_front_matter, get_current_timestamp, timestamp_ns
+)
 
+# Shared by every Note created without tags; replaced by a list on the first add_tag()
+_EMPTY_TAGS = ()
+
+def _sortable_ns(value) -> int:
+    """A note timestamp as nanoseconds for sorting; unreadable ones (kept as written) sort as 0."""
+    if isinstance(value, int):
+        return value
+    return timestamp_ns(value) or 0
+
+def note_sort_key(note) -> tuple:
+    """Sort key for notes by date (updated, else created), ties broken by filepath."""
+    return (_sortable_ns(note.updated) or _sortable_ns(note.created), note.filepath)
+
+@functools.total_ordering
 class Note:
+    """
+    A note file. Notes order newest first ("smaller" means more recently
+    updated), matching sorted(notes, key=note_sort_key, reverse=True), so a
+    list sorted that way can be maintained with bisect.insort().
+    """
+    # No per-instance __dict__: a notes folder can hold many thousands of these
+    __slots__ = ('filepath', 'title', 'tags', 'created', 'updated', '_content',
+                 '_cached_subtitle', '_cached_subtitle_for')
+
     def __init__(self, filepath, title="", tags=None, created=None, updated=None, content=""):
         self.filepath = filepath
         self.title = title
-        self.tags = tags if tags is not None else []
+        self.tags = tags if tags is not None else _EMPTY_TAGS
+        # int nanoseconds since the epoch (see utils.get_current_timestamp), or the
+        # front-matter value as written if it could not be read as a timestamp
         self.created = created
         self.updated = updated
-        self.content = content # Markdown content without front-matter
+        self._content = content # Markdown content without front-matter, None until read
+        # Notes list subtitle computed by the GUI, valid while _cached_subtitle_for == updated
+        self._cached_subtitle = None
+        self._cached_subtitle_for = None
+
+    def add_tag(self, tag: str):
+        """Appends a tag, copying shared/immutable tags into a list of this note's own first."""
+        if not isinstance(self.tags, list):
+            self.tags = list(self.tags)
+        self.tags.append(tag)
+        self._cached_subtitle = None # Shows the first tags
+
+    @property
+    def content(self) -> str:
+        """Markdown content without front-matter, read from disk on first access."""
+        if self._content is None:
+            self._content = _read_body(self.filepath)
+        return self._content
+
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+
+    def read_content(self) -> str:
+        """Returns the content like .content, but reads it from disk without keeping it on the note."""
+        return self._content if self._content is not None else _read_body(self.filepath)
+
+    def __lt__(self, other):
+        if not isinstance(other, Note):
+            return NotImplemented
+        return note_sort_key(self) > note_sort_key(other)
 
     def __repr__(self):
         return f"<Note title='{self.title}' path='{self.filepath}'>"
 
+# --- Metadata cache ---
+NOTES_CACHE_FILENAME = ".notes_cache.json"
+_NOTES_CACHE_VERSION = 2 # 2: created/updated stored as int nanoseconds
+
+def _json_default(value):
+    """Serializes YAML-native dates (unquoted timestamps) for the JSON cache."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _load_cache(notes_dir: str) -> dict:
+    """
+    Loads the metadata cache for a notes directory.
+    Maps filename -> [mtime_ns, size, title, tags, created, updated].
+    Returns an empty cache if the file is missing, unreadable or from another version.
+    """
+    cache_path = os.path.join(notes_dir, NOTES_CACHE_FILENAME)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != _NOTES_CACHE_VERSION:
+        return {}
+    entries = data.get('entries')
+    return entries if isinstance(entries, dict) else {}
+
+def _valid_cache_entry(entry) -> bool:
+    """
+    Whether a cache entry has the shape _load_cache documents. Entries that don't
+    (hand edits, sync conflicts) are treated as cache misses and re-parsed.
+    """
+    if not isinstance(entry, list) or len(entry) != 6:
+        return False
+    mtime_ns, size, title, tags, created, updated = entry
+    return (isinstance(mtime_ns, int) and isinstance(size, int) and isinstance(title, str)
+            and isinstance(tags, list) and isinstance(created, (int, str)) and isinstance(updated, (int, str)))
+
+def _save_cache(notes_dir: str, cache: dict):
+    """Writes the metadata cache atomically (temp file + os.replace)."""
+    cache_path = os.path.join(notes_dir, NOTES_CACHE_FILENAME)
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': _NOTES_CACHE_VERSION, 'entries': cache}, f, default=_json_default)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Error saving notes cache {cache_path}: {e}")
+
+def iter_note_entries(notes_dir: str):
+    """
+    Yields an os.DirEntry for each .md file in notes_dir, from a single
+    os.scandir pass. Entries carry the path and cache stat() results, so
+    callers need no os.path.join/os.stat of their own.
+    """
+    with os.scandir(notes_dir) as it:
+        for dir_entry in it:
+            # Name test first: is_file() may need a stat() for entries like ignore_me.txt
+            if dir_entry.name.endswith('.md') and dir_entry.is_file():
+                yield dir_entry
+
+PARALLEL_LOAD_MIN_FILES = 16 # Fewer files than this to parse are read on the calling thread
+
+def _collect_loaded(notes: list, fresh_cache: dict, names: list, stats: dict, to_load: list, results):
+    """Stores the notes loaded for the indices in to_load, and their metadata cache entries."""
+    for i, note in zip(to_load, results):
+        if note is None:
+            continue
+        st = stats[names[i]][1]
+        notes[i] = note
+        fresh_cache[names[i]] = [st.st_mtime_ns, st.st_size, note.title, note.tags, note.created, note.updated]
+
 def scan_notes_directory(notes_dir: str) -> list[Note]:
-    """Scans the directory for .md files and loads them."""
+    """
+    Scans the directory for .md files and loads them.
+    Only front-matter is parsed, concurrently, and only for files whose mtime or
+    size differ from the metadata cache; note content is read lazily on first
+    access. Notes are returned in filename order.
+    """
     notes = []
     if not os.path.isdir(notes_dir):
         print(f"Error: Notes directory '{notes_dir}' not found or not a directory.")
         return notes
 
-    for md_file in glob.glob(os.path.join(notes_dir, "*.md")):
-        note = load_note(md_file)
-        if note:
-            notes.append(note)
-    return notes
+    cache = _load_cache(notes_dir)
+    stats = {} # filename -> (path, stat_result)
+    for dir_entry in iter_note_entries(notes_dir):
+        try:
+            stats[dir_entry.name] = (dir_entry.path, dir_entry.stat())
+        except OSError:
+            continue
+
+    names = sorted(stats)
+    notes = [None] * len(names) # Filled by index, in filename order
+    fresh_cache = {}
+    to_load = [] # indices of files that need their front-matter parsed
+    for i, name in enumerate(names):
+        path, st = stats[name]
+        entry = cache.get(name)
+        if _valid_cache_entry(entry) and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            _, _, title, tags, created, updated = entry
+            notes[i] = Note(path, title=title, tags=tags, created=created, updated=updated, content=None)
+            fresh_cache[name] = entry
+        else:
+            to_load.append(i)
+
+    if to_load:
+        paths = [stats[names[i]][0] for i in to_load]
+        if len(to_load) < PARALLEL_LOAD_MIN_FILES:
+            # A rescan usually finds only a few changed files: spinning up threads costs more than it saves
+            _collect_loaded(notes, fresh_cache, names, stats, to_load, map(load_note_meta, paths))
+        else:
+            max_workers = min(32, (os.cpu_count() or 4) * 4, len(to_load))
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                _collect_loaded(notes, fresh_cache, names, stats, to_load, pool.map(load_note_meta, paths))
+
+    if to_load or len(fresh_cache) != len(cache):
+        _save_cache(notes_dir, fresh_cache)
+    return [note for note in notes if note is not None]
+
+# --- Notes directory handle ---
+# (directory path, its normalized form, O_DIRECTORY fd) or None
+_notes_dir_handle = None
+
+def set_notes_dir(notes_dir: str | None):
+    """
+    Registers the notes directory. Where the platform supports it, a descriptor
+    for the directory is kept open and files directly inside it are opened and
+    renamed relative to it (openat/renameat) instead of resolving the full path
+    on every call. Call from the GUI thread while no note I/O is in flight.
+    """
+    global _notes_dir_handle
+    old_handle, _notes_dir_handle = _notes_dir_handle, None
+    if old_handle is not None:
+        os.close(old_handle[2])
+    if notes_dir is None or os.open not in os.supports_dir_fd or not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        fd = os.open(notes_dir, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError as e:
+        print(f"Error opening notes directory {notes_dir}: {e}")
+        return
+    _notes_dir_handle = (notes_dir, os.path.normpath(notes_dir), fd)
+
+def _dir_fd_for(filepath: str) -> tuple[str, int | None]:
+    """Returns (name, dir_fd) for a file in the registered notes directory, else (filepath, None)."""
+    handle = _notes_dir_handle
+    if handle is not None:
+        directory, name = os.path.split(filepath)
+        if directory == handle[0] or directory == handle[1]:
+            return name, handle[2]
+    return filepath, None
+
+def _open_note_file(filepath: str, buffering: int = -1):
+    """Opens a note file for binary reading, relative to the notes directory handle when possible."""
+    name, dir_fd = _dir_fd_for(filepath)
+    fd = os.open(name, os.O_RDONLY | getattr(os, 'O_BINARY', 0), dir_fd=dir_fd)
+    return open(fd, 'rb', buffering=buffering)
+
+def _default_title(filepath: str) -> str:
+    """The file name without its .md extension, in one right-to-left scan per separator."""
+    name = filepath.rsplit(os.sep, 1)[-1]
+    if os.altsep:
+        name = name.rsplit(os.altsep, 1)[-1]
+    return name[:-3] if name.endswith('.md') else name
+
+def _timestamp_or_raw(value):
+    """The front-matter timestamp as nanoseconds, or the value itself if it can't be read as one."""
+    ns = timestamp_ns(value)
+    return value if ns is None else ns
+
+def _note_from_metadata(filepath: str, metadata: dict, content: str | None) -> Note:
+    """Builds a Note from parsed front-matter, filling in defaults for missing keys."""
+    if 'title' in metadata:
+        title = metadata['title']
+    else:
+        title = _default_title(filepath)
+    tags = metadata.get('tags', [])
+    # Unreadable timestamps are kept as written, so saving the note doesn't replace them
+    created = metadata.get('created')
+    created = get_current_timestamp() if created is None else _timestamp_or_raw(created) # Default to now if not present
+    updated = metadata.get('updated')
+    updated = created if updated is None else _timestamp_or_raw(updated) # Default to created time if not present
+
+    return Note(
+        filepath=filepath,
+        title=title,
+        tags=tags,
+        created=created,
+        updated=updated,
+        content=content
+    )
+
+# From this size, load_note parses the file through an mmap instead of reading it into bytes
+_MMAP_MIN_SIZE = 1 << 20
 
 def load_note(filepath: str) -> Note | None:
     """Loads a single note from an .md file, parsing front-matter."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            full_content = f.read()
-
-        metadata, content = parse_yaml_front_matter(full_content)
-
-        # Ensure essential metadata, provide defaults if missing
-        title = metadata.get('title', os.path.splitext(os.path.basename(filepath))[0])
-        tags = metadata.get('tags', [])
-        created = metadata.get('created', get_current_timestamp()) # Default to now if not present
-        updated = metadata.get('updated', created) # Default to created time if not present
-
-        return Note(
-            filepath=filepath,
-            title=title,
-            tags=tags,
-            created=created,
-            updated=updated,
-            content=content
-        )
+        # Unbuffered: readall() sizes its buffer from fstat and reads the file in one go,
+        # with no intermediate BufferedReader/TextIOWrapper copies
+        with _open_note_file(filepath, buffering=0) as f:
+            if os.fstat(f.fileno()).st_size < _MMAP_MIN_SIZE:
+                metadata, content = parse_yaml_front_matter(f.readall())
+            else:
+                # Large notes are split straight from the page cache: the header is found
+                # in place, and only the body is copied out (and decoded), not the whole file.
+                # Notes are saved by replacing the file, so the mapped one is never truncated.
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    metadata, content = parse_yaml_front_matter(mapped)
+        return _note_from_metadata(filepath, metadata, content)
     except Exception as e:
         print(f"Error loading note {filepath}: {e}")
         return None
 
-def save_note(note: Note) -> bool:
-    """Saves a note object to its .md file, including front-matter."""
+_HEADER_READ_SIZE = 8192
+_CLOSING_DELIMITER_REGEX = re.compile(rb'\n---[ \t]*\r?\n')
+
+def _read_header(filepath: str) -> bytes:
+    """
+    Returns the raw front-matter block of a note file (b'' if there is none).
+    A single 8 KiB read covers almost every header; the rest of the file is
+    only read when the closing delimiter is not within that prefix.
+    """
+    with _open_note_file(filepath) as f:
+        prefix = f.read(_HEADER_READ_SIZE)
+        if not prefix.startswith(b'---'):
+            return b''
+        match = _CLOSING_DELIMITER_REGEX.search(prefix, 3)
+        if match is None:
+            prefix += f.read()
+            match = _CLOSING_DELIMITER_REGEX.search(prefix, 3)
+            if match is None:
+                return b''
+    return prefix[:match.end()]
+
+def load_note_meta(filepath: str) -> Note | None:
+    """
+    Loads only the front-matter of a note. The returned Note has no content;
+    it is read from disk the first time Note.content is accessed.
+    """
+    try:
+        metadata, _ = parse_yaml_front_matter(_read_header(filepath))
+        return _note_from_metadata(filepath, metadata, None)
+    except Exception as e:
+        print(f"Error loading note metadata {filepath}: {e}")
+        return None
+
+def _read_body(filepath: str) -> str:
+    """Reads the Markdown content of a note file, without its front-matter."""
+    note = load_note(filepath)
+    return note.content if note else ""
+
+def _render_note(note: Note) -> bytes:
+    """Serializes a note (front-matter + content) to the UTF-8 bytes stored on disk."""
+    front_matter_str = generate_note_front_matter(note.title, note.tags, note.created, note.updated)
+    return f"{front_matter_str}\n{note.content.strip()}".encode('utf-8')
+
+def _write_all(fd: int, data: bytes):
+    """Writes data to a raw file descriptor, with no file object around it; retries short writes."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def save_note(note: Note, durable: bool = False) -> bool:
+    """
+    Saves a note object to its .md file, including front-matter.
+    The file is written to a temporary file in the same directory with a single
+    write and moved over the original with os.replace, so a crash never leaves a
+    truncated note behind. With durable, the data is also fsynced before the
+    rename, so it survives a power loss too (at the cost of waiting for the disk).
+    """
     try:
-        metadata = {
-            'title': note.title,
-            'tags': note.tags,
-            'created': note.created,
-            'updated': note.updated
-        }
-        front_matter_str = generate_yaml_front_matter(metadata)
-        full_content = f"{front_matter_str}\n{note.content.strip()}"
-
-        os.makedirs(os.path.dirname(note.filepath), exist_ok=True) # Ensure directory exists
-        with open(note.filepath, 'w', encoding='utf-8') as f:
-            f.write(full_content)
+        payload = _render_note(note)
+        directory = os.path.dirname(note.filepath)
+        os.makedirs(directory, exist_ok=True) # Ensure directory exists
+
+        name, dir_fd = _dir_fd_for(note.filepath)
+        # Per process and thread: the GUI thread and the auto-save writer never share one
+        tmp_name = f"{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # Keep the permissions of the note being replaced
+            mode = os.stat(name, dir_fd=dir_fd).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+        fd = os.open(tmp_name, flags, mode, dir_fd=dir_fd)
+        try:
+            try:
+                _write_all(fd, payload)
+                if durable:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_name, name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+        except BaseException:
+            try:
+                os.remove(tmp_name, dir_fd=dir_fd)
+            except FileNotFoundError:
+                pass
+            raise
         return True
     except Exception as e:
         print(f"Error saving note {note.filepath}: {e}")
         return False
 
+class AsyncNoteWriter:
+    """
+    Saves notes on a background thread.
+    Pending saves are keyed by filepath: saving a note again before the writer
+    got to it replaces the pending entry instead of queueing a second write.
+    """
+    def __init__(self):
+        self._pending = {} # filepath -> Note, in arrival order
+        self._writing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="AsyncNoteWriter", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, note: Note):
+        """Schedules a save of the note's current state."""
+        with self._cond:
+            self._pending[note.filepath] = note
+            self._cond.notify_all()
+
+    def discard(self, filepath: str):
+        """Drops a pending save, e.g. before the note's file is deleted."""
+        with self._cond:
+            self._pending.pop(filepath, None)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Blocks until every pending save is written. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def close(self):
+        """Writes the remaining saves and stops the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return # Closed and drained
+                filepath = next(iter(self._pending))
+                note = self._pending.pop(filepath)
+                self._writing = True
+            try:
+                save_note(note)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+_SLUG_REGEX = re.compile(r'[^a-z0-9_]+')
+_SPACE_TO_UNDERSCORE = str.maketrans(' ', '_')
+
 def create_new_note(notes_dir: str, title: str, tags: list = None, content: str = "") -> Note | None:
     """Creates a new note file with basic front-matter."""
-    filename = f"{title.lower().replace(' ', '_'). Gsub(r'[^a-z0-9_]', '')}.md" # Basic slugify
+    now = get_current_timestamp()
+    filename = f"{_SLUG_REGEX.sub('', title.lower().translate(_SPACE_TO_UNDERSCORE))}.md" # Basic slugify
     if not filename.strip() or filename == ".md": # Handle empty or invalid titles
-        filename = f"untitled_{datetime.now().strftime('%Y%m%d%H%M%S')}.md"
+        # Local YYYYMMDDHHMMSS, taken from the same timestamp as the metadata.
+        filename = f"untitled_{datetime.fromtimestamp(now // 1_000_000_000).strftime('%Y%m%d%H%M%S')}.md"
 
-    filepath = os.path.join(notes_dir, filename)
-    
-    # Avoid overwriting existing file by appending number if needed
-    counter = 1
-    base_filepath, ext = os.path.splitext(filepath)
-    while os.path.exists(filepath):
-        filepath = f"{base_filepath}_{counter}{ext}"
-        counter += 1
-
-    now = get_current_timestamp()
     note = Note(
-        filepath=filepath,
+        filepath=os.path.join(notes_dir, filename),
         title=title,
         tags=tags if tags is not None else [],
         created=now,
         updated=now,
         content=content
     )
-    if save_note(note):
+
+    # Avoid overwriting an existing file by appending a number if needed.
+    # O_CREAT | O_EXCL reserves the name atomically, so there is no exists()/open() race.
+    base_filepath, ext = os.path.splitext(note.filepath)
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+    try:
+        payload = _render_note(note)
+        os.makedirs(notes_dir, exist_ok=True) # Ensure directory exists
+        for counter in itertools.count():
+            candidate = note.filepath if counter == 0 else f"{base_filepath}_{counter}{ext}"
+            try:
+                name, dir_fd = _dir_fd_for(candidate)
+                fd = os.open(name, flags, 0o644, dir_fd=dir_fd)
+                break
+            except FileExistsError:
+                continue
+        note.filepath = candidate
+        try:
+            try:
+                _write_all(fd, payload)
+            finally:
+                os.close(fd)
+        except BaseException:
+            os.remove(candidate)
+            raise
         return note
-    return None
+    except Exception as e:
+        print(f"Error creating note {note.filepath}: {e}")
+        return None
 
 def delete_note_file(filepath: str) -> bool:
     """Deletes the .md file from the file system."""
@@ -142,7 +527,7 @@ if __name__ == '__main__':
 
             # Update note
             loaded_note.content += "\n\nAn update was made."
-            loaded_note.tags.append("updated")
+            loaded_note.add_tag("updated")
             loaded_note.updated = get_current_timestamp()
             if save_note(loaded_note):
                 print("Note updated and saved.")
@@ -5,18 +5,26 @@ Handles overall application logic and state.
 """
 import sys
 import os
+import bisect
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QListWidget, QListWidgetItem, QSplitter, QStatusBar, QMessageBox,
+    QListWidget, QListWidgetItem, QListView, QSplitter, QStatusBar, QMessageBox,
     QFileDialog, QInputDialog, QToolBar, QLabel,
     QLineEdit, QPushButton, QComboBox, QSpinBox, QDialogButtonBox,
-    QDialog
+    QDialog, QStyle, QStyledItemDelegate
 )
-from PyQt6.QtGui import QAction, QIcon, QKeySequence
-from PyQt6.QtCore import Qt, QSize, pyqtSignal
-
+from PyQt6.QtGui import QAction, QIcon, QKeySequence, QColor, QFont
+from PyQt6.QtCore import (
+    Qt, QSize, pyqtSignal, QObject, QAbstractListModel, QModelIndex, QFileSystemWatcher, QTimer,
+    QRunnable, QThreadPool, QThread, QUrl
+)
+from PyQt6.QtWebEngineCore import QWebEngineProfile
 from . import APP_NAME, VERSION
-from .file_manager import Note, scan_notes_directory, load_note, save_note, create_new_note, delete_note_file
+from .file_manager import (
+    Note, note_sort_key, scan_notes_directory, iter_note_entries, load_note, save_note, create_new_note, delete_note_file,
+    AsyncNoteWriter, set_notes_dir
+)
 from .editor import MarkdownEditor
 from .viewer import MarkdownViewer
 from .search import SearchIndex
@@ -84,23 +92,205 @@ class SettingsDialog(QDialog): # Basic Settings Dialog
             "font_size": self.font_spinbox.value()
         }
 
+# This is a very basic dark theme. A full theme requires more qss.
+_DARK_QSS = """
+QMainWindow, QWidget { background-color: #333; color: #ccc; }
+QListView { background-color: #444; color: #ccc; border: 1px solid #555; }
+QListView::item:selected { background-color: #557; }
+QPlainTextEdit { background-color: #2a2a2a; color: #ddd; border: 1px solid #555; }
+QLineEdit { background-color: #444; color: #ccc; border: 1px solid #555; }
+QPushButton { background-color: #555; color: #ccc; border: 1px solid #666; padding: 5px; }
+QPushButton:hover { background-color: #666; }
+QMenuBar { background-color: #333; color: #ccc; }
+QMenuBar::item:selected { background-color: #555; }
+QMenu { background-color: #444; color: #ccc; border: 1px solid #555; }
+QMenu::item:selected { background-color: #557; }
+QStatusBar { background-color: #333; color: #ccc; }
+QSplitter::handle { background-color: #555; }
+QLabel { color: #ccc; }
+QToolBar { background-color: #333; border: none; }
+"""
+_LIGHT_QSS = "" # Default style
+
+FILTER_CACHE_SIZE = 32 # Filter results kept per (query, tag)
+NOTE_SUBTITLE_ROLE = Qt.ItemDataRole.UserRole + 1 # "updated | Tags: ..." line under the title
+
+def note_subtitle(note: Note) -> str:
+    """Returns the "updated | Tags" line for a note, memoized on the note until it is updated."""
+    if note._cached_subtitle is None or note._cached_subtitle_for != note.updated:
+        note._cached_subtitle = f"{format_timestamp_display(note.updated)} | Tags: {', '.join(note.tags[:3])}"
+        note._cached_subtitle_for = note.updated
+    return note._cached_subtitle
+
+class NotesModel(QAbstractListModel):
+    """List model over the Note objects shown in the notes list (no per-row widgets)."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._notes = []
+        self._row_by_path = {} # filepath -> row, rebuilt on every set_notes()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._notes)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._notes):
+            return None
+        note = self._notes[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return note.title
+        if role == Qt.ItemDataRole.UserRole:
+            return note.filepath
+        if role == NOTE_SUBTITLE_ROLE:
+            return note_subtitle(note)
+        return None
+
+    def set_notes(self, notes: list[Note]):
+        """Replaces the displayed notes with a single model reset."""
+        notes = list(notes)
+        if notes == self._notes: # Same notes in the same order (Note equality is identity)
+            if notes:
+                # No reset, so selection and scroll position survive; just repaint the rows
+                self.dataChanged.emit(self.index(0), self.index(len(notes) - 1))
+            return
+        self.beginResetModel()
+        self._notes = notes
+        self._row_by_path = {note.filepath: row for row, note in enumerate(self._notes)}
+        self.endResetModel()
+
+    def refresh_note(self, filepath: str):
+        """Tells the view that the note's row changed (e.g. its updated timestamp)."""
+        row = self.row_of(filepath)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def row_of(self, filepath: str) -> int:
+        """Returns the row showing the given note, or -1 if it is not displayed."""
+        return self._row_by_path.get(filepath, -1)
+
+class NotesDelegate(QStyledItemDelegate):
+    """Paints a note row as a bold title with a small gray subtitle underneath."""
+    PADDING = 4
+    ROW_HEIGHT = 48 # Same for every row, so the view can use uniform item sizes
+
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, widget)
+
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        rect = option.rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        subtitle_font = QFont(option.font)
+        subtitle_font.setBold(False)
+        subtitle_font.setPointSizeF(max(subtitle_font.pointSizeF() * 0.85, 6.0))
+
+        painter.save()
+        painter.setFont(title_font)
+        painter.setPen(option.palette.highlightedText().color() if selected else option.palette.text().color())
+        title_height = painter.fontMetrics().height()
+        title = painter.fontMetrics().elidedText(index.data(Qt.ItemDataRole.DisplayRole) or "",
+                                                 Qt.TextElideMode.ElideRight, rect.width())
+        painter.drawText(rect.adjusted(0, 0, 0, -(rect.height() - title_height)),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, title)
+
+        painter.setFont(subtitle_font)
+        painter.setPen(option.palette.highlightedText().color() if selected else QColor("gray"))
+        subtitle = painter.fontMetrics().elidedText(index.data(NOTE_SUBTITLE_ROLE) or "",
+                                                    Qt.TextElideMode.ElideRight, rect.width())
+        painter.drawText(rect.adjusted(0, title_height, 0, 0),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, subtitle)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(-1, self.ROW_HEIGHT)
+
+class FilterJobSignals(QObject):
+    """Carries search results from FilterJob back to the GUI thread."""
+    finished = pyqtSignal(int, str, object) # generation, query, set of matching filepaths
+
+class FilterJob(QRunnable):
+    """Runs a search query on a QThreadPool worker."""
+    def __init__(self, generation: int, search_fn, query: str, signals: FilterJobSignals):
+        super().__init__()
+        self.generation = generation
+        self._search = search_fn
+        self._query = query
+        self._signals = signals
+
+    def run(self):
+        self._signals.finished.emit(self.generation, self._query, self._search(self._query))
+
+class ScanWorker(QObject):
+    """Scans a notes directory and indexes it on a QThread so the window stays responsive."""
+    finished = pyqtSignal(list, object) # list[Note], SearchIndex
+
+    def __init__(self, notes_dir: str):
+        super().__init__()
+        self.notes_dir = notes_dir
+
+    def run(self):
+        notes = scan_notes_directory(self.notes_dir)
+        search_index = SearchIndex()
+        search_index.build_index(notes) # Reads the note bodies here, not on the GUI thread
+        self.finished.emit(notes, search_index)
+
 class MainWindow(QMainWindow):
     notes_reloaded_signal = pyqtSignal()
+    _ICONS: dict[str, QIcon] = {} # Theme icon name -> icon, shared by all windows
 
     def __init__(self):
         super().__init__()
         self.current_note_filepath = None
         self.notes_list_data = [] # Stores Note objects for the list
+        self._notes_by_path = {} # filepath -> Note, for every note in notes_list_data
         self.search_index = SearchIndex()
+        self.note_writer = AsyncNoteWriter() # Auto-saves are written off the GUI thread
         self.unsaved_changes = False
-
-        self.init_ui()
-        self.load_initial_notes()
-        self.apply_settings_to_ui()
+        self._scan_thread = None # QThread running a ScanWorker, if a scan is in progress
+        self._rescan_requested = False
+
+        # Picks up notes added or removed outside the app without a full rescan
+        self.notes_watcher = QFileSystemWatcher(self)
+        self._notes_dir_sync_timer = QTimer(self) # Coalesces bursts of directory events
+        self._notes_dir_sync_timer.setSingleShot(True)
+        self._notes_dir_sync_timer.setInterval(200)
+        self._notes_dir_sync_timer.timeout.connect(self.sync_notes_directory)
+        self.notes_watcher.directoryChanged.connect(self._notes_dir_sync_timer.start)
+
+        # Search-as-you-type: wait for a pause in typing, then search off the GUI thread
+        self._filter_gen = 0 # Bumped on every filter request; stale job results are dropped
+        self._filter_job_gen = None # Generation of the filter job still running, if any
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(150)
+        self._filter_timer.timeout.connect(self._kick_filter_job)
+        self._filter_signals = FilterJobSignals(self)
+        self._filter_signals.finished.connect(self._on_filter_job_finished)
+        self._filter_cache = OrderedDict() # (query, tag) -> list[Note], least recently used first
+
+        # Editor changes re-render the preview once typing pauses (debounced by the viewer),
+        # and auto-save (if enabled) waits for auto_save_interval ms without changes.
+        self._last_editor_text = "" # Last text seen from the editor, to ignore no-op change signals
+        self._autosave_timer = QTimer(self)
+        self._autosave_timer.setSingleShot(True)
+        self._autosave_timer.timeout.connect(lambda: self.save_current_note(auto_save=True))
 
         self.notes_reloaded_signal.connect(self.update_note_list_display)
         self.notes_reloaded_signal.connect(self.update_tag_filter_panel)
 
+        self.init_ui()
+        self.show()
+        # Paint the window first; menus, notes and settings follow on the next event-loop pass
+        QTimer.singleShot(0, self._post_show_init)
+
+    def _post_show_init(self):
+        """Builds menus/toolbar, starts the notes scan and applies settings once the window is up."""
+        self.setup_menus_and_toolbar()
+        self.load_initial_notes()
+        self.apply_settings_to_ui()
 
     def init_ui(self):
         self.setWindowTitle(f"{APP_NAME} v{VERSION}")
@@ -124,11 +314,19 @@ class MainWindow(QMainWindow):
         # Search bar for notes
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("Search notes (title, tag, content)...")
-        self.search_bar.textChanged.connect(self.filter_notes_list)
+        self.search_bar.textChanged.connect(self._filter_timer.start) # Debounced, see _kick_filter_job
         left_pane_layout.addWidget(self.search_bar)
 
-        self.notes_list_widget = QListWidget()
-        self.notes_list_widget.currentItemChanged.connect(self.on_note_selected)
+        self.notes_model = NotesModel(self)
+        self.notes_list_widget = QListView()
+        self.notes_list_widget.setModel(self.notes_model)
+        self.notes_list_widget.setItemDelegate(NotesDelegate(self.notes_list_widget))
+        # All rows share one height: Qt sizes the scroll range from a single row instead of asking each one,
+        # and lays out large lists in batches so the view stays responsive.
+        self.notes_list_widget.setUniformItemSizes(True)
+        self.notes_list_widget.setLayoutMode(QListView.LayoutMode.Batched)
+        self.notes_list_widget.setBatchSize(50)
+        self.notes_list_widget.selectionModel().currentChanged.connect(self.on_note_selected)
         left_pane_layout.addWidget(self.notes_list_widget)
 
         # Tag filter panel
@@ -177,24 +375,22 @@ class MainWindow(QMainWindow):
         self.statusBar.addPermanentWidget(self.status_label_note_count, 1)
         self.statusBar.addPermanentWidget(self.status_label_current_note, 2)
 
-        self.setup_menus_and_toolbar()
-        self.show()
-
     def setup_menus_and_toolbar(self):
         # --- Actions ---
         # File Actions
-        new_action = QAction(QIcon.fromTheme("document-new", QIcon(os.path.join("assets", "new.png"))), "&New Note", self)
+        new_action = QAction(self._icon("document-new", "new.png"), "&New Note", self)
         new_action.setShortcut(QKeySequence.StandardKey.New)
         new_action.setStatusTip("Create a new note")
         new_action.triggered.connect(self.create_new_note_dialog)
+        self.new_action = new_action # Disabled while notes are being scanned
 
-        save_action = QAction(QIcon.fromTheme("document-save", QIcon(os.path.join("assets", "save.png"))), "&Save Note", self)
+        save_action = QAction(self._icon("document-save", "save.png"), "&Save Note", self)
         save_action.setShortcut(QKeySequence.StandardKey.Save)
         save_action.setStatusTip("Save the current note")
         save_action.triggered.connect(self.save_current_note)
         self.save_action = save_action # Keep a reference to enable/disable
 
-        delete_action = QAction(QIcon.fromTheme("edit-delete", QIcon(os.path.join("assets", "delete.png"))), "&Delete Note", self)
+        delete_action = QAction(self._icon("edit-delete", "delete.png"), "&Delete Note", self)
         delete_action.setShortcut(QKeySequence.StandardKey.Delete)
         delete_action.setStatusTip("Delete the current note")
         delete_action.triggered.connect(self.delete_current_note)
@@ -204,11 +400,11 @@ class MainWindow(QMainWindow):
         export_html_action.setStatusTip("Export current note to HTML file")
         export_html_action.triggered.connect(self.export_note_to_html)
 
-        settings_action = QAction(QIcon.fromTheme("preferences-system", QIcon(os.path.join("assets", "settings.png"))), "&Settings", self)
+        settings_action = QAction(self._icon("preferences-system", "settings.png"), "&Settings", self)
         settings_action.setStatusTip("Application settings")
         settings_action.triggered.connect(self.open_settings_dialog)
 
-        exit_action = QAction(QIcon.fromTheme("application-exit", QIcon(os.path.join("assets", "exit.png"))), "E&xit", self)
+        exit_action = QAction(self._icon("application-exit", "exit.png"), "E&xit", self)
         exit_action.setShortcut(QKeySequence.StandardKey.Quit)
         exit_action.setStatusTip("Exit application")
         exit_action.triggered.connect(self.close)
@@ -221,10 +417,11 @@ class MainWindow(QMainWindow):
         # paste_action = QAction(QIcon.fromTheme("edit-paste"), "&Paste", self)
 
         # View Actions
-        reload_notes_action = QAction(QIcon.fromTheme("view-refresh", QIcon(os.path.join("assets", "reload.png"))), "&Reload Notes", self)
+        reload_notes_action = QAction(self._icon("view-refresh", "reload.png"), "&Reload Notes", self)
         reload_notes_action.setShortcut(QKeySequence("F5"))
         reload_notes_action.setStatusTip("Rescan notes folder and refresh list")
         reload_notes_action.triggered.connect(self.load_initial_notes)
+        self.reload_notes_action = reload_notes_action
 
 
         # --- Menu Bar ---
@@ -269,6 +466,13 @@ class MainWindow(QMainWindow):
         self.update_action_states()
 
 
+    def _icon(self, name: str, fallback: str) -> QIcon:
+        """Returns the theme icon (or the assets/ fallback), looked up and loaded only once."""
+        icon = self._ICONS.get(name)
+        if icon is None:
+            icon = self._ICONS[name] = QIcon.fromTheme(name, QIcon(os.path.join("assets", fallback)))
+        return icon
+
     def update_action_states(self):
         """Enable/disable actions based on current state."""
         has_current_note = self.current_note_filepath is not None
@@ -282,35 +486,12 @@ class MainWindow(QMainWindow):
         self.markdown_editor.set_font_size(font_size)
 
         theme = app_settings.get("theme", "light")
-        self.markdown_viewer.set_theme(theme)
-        # Re-render current preview if any
-        if self.current_note_filepath:
-            note = self._find_note_by_filepath(self.current_note_filepath)
-            if note:
-                 self.markdown_viewer.set_markdown(note.content)
+        self.markdown_viewer.set_theme(theme) # Re-renders the current preview if the theme changed
 
         # Apply stylesheet for dark/light theme to the whole app
-        if theme == "dark":
-            # This is a very basic dark theme. A full theme requires more qss.
-            self.setStyleSheet("""
-                QMainWindow, QWidget { background-color: #333; color: #ccc; }
-                QListWidget { background-color: #444; color: #ccc; border: 1px solid #555; }
-                QListWidget::item:selected { background-color: #557; }
-                QTextEdit { background-color: #2a2a2a; color: #ddd; border: 1px solid #555; }
-                QLineEdit { background-color: #444; color: #ccc; border: 1px solid #555; }
-                QPushButton { background-color: #555; color: #ccc; border: 1px solid #666; padding: 5px; }
-                QPushButton:hover { background-color: #666; }
-                QMenuBar { background-color: #333; color: #ccc; }
-                QMenuBar::item:selected { background-color: #555; }
-                QMenu { background-color: #444; color: #ccc; border: 1px solid #555; }
-                QMenu::item:selected { background-color: #557; }
-                QStatusBar { background-color: #333; color: #ccc; }
-                QSplitter::handle { background-color: #555; }
-                QLabel { color: #ccc; }
-                QToolBar { background-color: #333; border: none; }
-            """)
-        else:
-            self.setStyleSheet("") # Reset to default style
+        qss = _DARK_QSS if theme == "dark" else _LIGHT_QSS
+        if self.styleSheet() != qss: # Setting it re-polishes every child widget
+            self.setStyleSheet(qss)
 
         # Ensure notes folder exists, or prompt user
         notes_dir = app_settings.get("notes_folder")
@@ -323,58 +504,140 @@ class MainWindow(QMainWindow):
 
 
     def load_initial_notes(self):
-        """Scans the notes directory and populates the list and search index."""
+        """
+        Scans the notes directory on a background thread; _on_scan_complete then
+        populates the list and search index.
+        """
+        # Reload and folder changes get here without check_unsaved_changes(): save the
+        # edits still waiting on the auto-save timer, then wait for the writer below
+        self._flush_pending_autosave()
+        if self._scan_thread is not None:
+            self._rescan_requested = True # e.g. the notes folder changed mid-scan
+            return
+        self.note_writer.flush() # Let pending auto-saves land before rescanning
+        self.clear_editor_and_preview()
         notes_dir = app_settings.get("notes_folder")
         if not os.path.isdir(notes_dir):
             self.statusBar.showMessage(f"Notes folder not found: {notes_dir}. Configure in Settings.", 5000)
-            self.notes_list_data = []
-        else:
-            self.notes_list_data = scan_notes_directory(notes_dir)
-            self.notes_list_data.sort(key=lambda n: (n.updated or n.created or ""), reverse=True) # Sort by date
+            set_notes_dir(None)
+            self._watch_notes_dir(None)
+            self._on_scan_complete([], SearchIndex())
+            return
+
+        set_notes_dir(notes_dir)
+        self._watch_notes_dir(notes_dir)
+        self._set_scanning(True)
+        self.statusBar.showMessage("Loading notes...")
+
+        thread = QThread(self)
+        worker = ScanWorker(notes_dir)
+        worker.moveToThread(thread)
+        thread.worker = worker # Keep the worker alive until the thread is done with it
+        thread.started.connect(worker.run)
+        worker.finished.connect(self._on_scan_complete)
+        # Direct, so closeEvent can wait() on the thread without a queued quit()
+        worker.finished.connect(thread.quit, Qt.ConnectionType.DirectConnection)
+        thread.finished.connect(thread.deleteLater)
+        self._scan_thread = thread
+        thread.start()
+
+    def _on_scan_complete(self, notes: list[Note], search_index: SearchIndex):
+        """Takes the scanned notes and their index, and refreshes the list and tag panel."""
+        self._scan_thread = None
+        if self._rescan_requested:
+            self._rescan_requested = False
+            self.load_initial_notes() # These results may be for a stale folder
+            return
+        self._set_scanning(False)
+        self.clear_editor_and_preview() # Saves pending edits before the old notes are replaced
+
+        self.notes_list_data = notes
+        self.notes_list_data.sort(key=note_sort_key, reverse=True) # Sort by date
+        self._notes_by_path = {note.filepath: note for note in self.notes_list_data}
         
-        self.search_index.build_index(self.notes_list_data)
-        self.clear_editor_and_preview()
-        self.current_note_filepath = None
-        self.unsaved_changes = False
-        self.update_action_states()
+        self.search_index = search_index
+        self._invalidate_filter_cache()
         self.notes_reloaded_signal.emit() # Will call update_note_list_display and update_tag_filter_panel
         self.status_label_note_count.setText(f"Notes: {len(self.notes_list_data)}")
         self.status_label_current_note.setText("No note selected")
-        self.statusBar.showMessage("Notes loaded.", 2000)
+        if os.path.isdir(app_settings.get("notes_folder")): # Keep the "folder not found" message
+            self.statusBar.showMessage("Notes loaded.", 2000)
+
+    def _set_scanning(self, scanning: bool):
+        """
+        Disables the note list, tag panel, editor and the actions that need them while a
+        scan is running, so no edits are made to notes the scan is about to replace.
+        """
+        self.new_action.setEnabled(not scanning)
+        self.reload_notes_action.setEnabled(not scanning)
+        self.notes_list_widget.setEnabled(not scanning)
+        self.tag_list_widget.setEnabled(not scanning) # update_tag_filter_panel may disable it again
+        self.markdown_editor.setEnabled(not scanning)
+        if scanning:
+            self.delete_action.setEnabled(False)
+        else:
+            self.update_action_states()
 
 
-    def update_note_list_display(self, notes_to_display: list[Note] = None):
-        """Updates the QListWidget with the given notes or all notes if None."""
-        self.notes_list_widget.blockSignals(True) # Avoid triggering selection change during repopulation
-        self.notes_list_widget.clear()
+    def _watch_notes_dir(self, notes_dir: str | None):
+        """Points the file system watcher at the current notes folder."""
+        watched = self.notes_watcher.directories()
+        if watched:
+            self.notes_watcher.removePaths(watched)
+        if notes_dir:
+            self.notes_watcher.addPath(notes_dir)
 
+    def sync_notes_directory(self):
+        """
+        Applies notes added or removed on disk since the last scan as single-note
+        index updates. Edits to existing files are picked up by Reload Notes (F5).
+        """
+        notes_dir = app_settings.get("notes_folder")
+        if self._scan_thread is not None or not os.path.isdir(notes_dir):
+            return # A running scan will pick up the changes
+        on_disk = {entry.path for entry in iter_note_entries(notes_dir)}
+        known = {note.filepath for note in self.notes_list_data}
+        added = on_disk - known
+        removed = known - on_disk
+        if not added and not removed:
+            return # e.g. our own saves (temp file + rename) or cache writes
+
+        for filepath in removed:
+            if filepath == self.current_note_filepath:
+                if self.unsaved_changes:
+                    continue # Keep the note so the user's edits can still be saved
+                self.clear_editor_and_preview()
+            self.notes_list_data.remove(self._notes_by_path.pop(filepath))
+            self.search_index.remove(filepath)
+        for filepath in sorted(added):
+            note = load_note(filepath)
+            if note:
+                self.notes_list_data.append(note)
+                self._notes_by_path[note.filepath] = note
+                self.search_index.add(note)
+
+        self.notes_list_data.sort(key=note_sort_key, reverse=True)
+        self._invalidate_filter_cache()
+        self.filter_notes_list()
+        self.update_tag_filter_panel()
+        self.status_label_note_count.setText(f"Notes: {len(self.notes_list_data)}")
+
+    def update_note_list_display(self, notes_to_display: list[Note] = None):
+        """Shows the given notes (or all notes if None) in the notes list view."""
         display_list = notes_to_display if notes_to_display is not None else self.notes_list_data
-        
-        for note in display_list:
-            # Display title and a snippet of date/tags
-            item_text = f"{note.title}\n<small>{format_timestamp_display(note.updated)} | Tags: {', '.join(note.tags[:3])}</small>"
-            list_item = QListWidgetItem()
-            
-            # Use a QLabel for rich text in QListWidgetItem for better rendering control
-            label = QLabel(item_text)
-            label.setStyleSheet("background-color: transparent;") # Ensure it inherits list background
-            list_item.setSizeHint(label.sizeHint()) # Important for proper item sizing
-            
-            self.notes_list_widget.addItem(list_item)
-            self.notes_list_widget.setItemWidget(list_item, label) # Set QLabel as item widget
-            
-            # Store the filepath in the item's data for later retrieval
-            list_item.setData(Qt.ItemDataRole.UserRole, note.filepath)
-        
-        self.notes_list_widget.blockSignals(False)
-        
+        # The delegate paints rows on demand, so this is one model reset instead of a widget per note.
+        # A model reset clears the current index without emitting currentChanged.
+        self.notes_model.set_notes(display_list)
+
         # Reselect current note if it's in the displayed list
         if self.current_note_filepath:
-            for i in range(self.notes_list_widget.count()):
-                item = self.notes_list_widget.item(i)
-                if item.data(Qt.ItemDataRole.UserRole) == self.current_note_filepath:
-                    self.notes_list_widget.setCurrentItem(item)
-                    break
+            self._select_note_in_list(self.current_note_filepath)
+
+    def _select_note_in_list(self, filepath: str):
+        """Makes the note's row current (triggers on_note_selected) if it is displayed."""
+        row = self.notes_model.row_of(filepath)
+        if row >= 0:
+            self.notes_list_widget.setCurrentIndex(self.notes_model.index(row))
 
 
     def update_tag_filter_panel(self):
@@ -407,32 +670,84 @@ class MainWindow(QMainWindow):
 
     def filter_notes_list(self):
         """Filters the note list based on search bar text and selected tag."""
+        self._filter_gen += 1 # Any in-flight filter job is now stale
+        self._filter_timer.stop()
         search_query = self.search_bar.text()
-        
+        cached = self._filter_cache_get(search_query)
+        if cached is not None:
+            self.update_note_list_display(cached)
+            return
+        search_paths = self.search_index.search_paths(search_query) if search_query.strip() else None
+        self._show_filtered_notes(search_query, search_paths)
+
+    def _kick_filter_job(self):
+        """Runs the search for the current query on the global thread pool."""
+        search_query = self.search_bar.text()
+        if not search_query.strip() or self._filter_cache_key(search_query) in self._filter_cache:
+            self.filter_notes_list() # Nothing to search (or a cached result), no job needed
+            return
+        self._filter_gen += 1
+        self._filter_job_gen = self._filter_gen
+        job = FilterJob(self._filter_gen, self.search_index.search_paths, search_query, self._filter_signals)
+        QThreadPool.globalInstance().start(job)
+
+    def _on_filter_job_finished(self, generation: int, search_query: str, search_paths: set[str]):
+        """Shows the results of a filter job unless a newer filter request superseded it."""
+        if generation == self._filter_job_gen:
+            self._filter_job_gen = None
+        if generation != self._filter_gen:
+            return
+        self._show_filtered_notes(search_query, search_paths)
+
+    def _current_tag_filter(self) -> str | None:
+        """Returns the tag selected in the filter panel, or None for "All Notes"."""
         selected_tag_item = self.tag_list_widget.currentItem()
-        tag_filter = None
         if selected_tag_item:
-            tag_filter = selected_tag_item.data(Qt.ItemDataRole.UserRole) # This could be None for "All Notes"
+            return selected_tag_item.data(Qt.ItemDataRole.UserRole) # This could be None for "All Notes"
+        return None
 
-        # Start with all notes or notes filtered by tag
+    def _filter_cache_key(self, search_query: str) -> tuple:
+        return (search_query.strip().lower(), self._current_tag_filter())
+
+    def _filter_cache_get(self, search_query: str) -> list[Note] | None:
+        """Returns the cached filter result for the query and selected tag, if any."""
+        key = self._filter_cache_key(search_query)
+        cached = self._filter_cache.get(key)
+        if cached is not None:
+            self._filter_cache.move_to_end(key)
+        return cached
+
+    def _invalidate_filter_cache(self):
+        """Drops cached filter results; call whenever notes are added, changed or removed."""
+        self._filter_cache.clear()
+        # Filter jobs still running searched the old index: drop their results rather than
+        # showing (and caching) them, and search the new index again in their place
+        superseded = self._filter_job_gen is not None and self._filter_job_gen == self._filter_gen
+        self._filter_gen += 1
+        if superseded:
+            self._filter_job_gen = None
+            self._filter_timer.start()
+
+    def _show_filtered_notes(self, search_query: str, search_paths: set[str] | None):
+        """Displays (and caches) the notes matching the selected tag and, if given, the search results."""
+        tag_filter = self._current_tag_filter()
+
+        # Narrow down filepaths with set intersections; None means "no restriction"
+        final_paths = search_paths
         if tag_filter:
-            notes_to_filter = self.search_index.filter_by_tag(tag_filter)
-        else: # "All Notes" or no tag selected
-            notes_to_filter = self.notes_list_data[:] # Work on a copy
-
-        # If there's a search query, further filter these notes
-        if search_query.strip():
-            # We need to rebuild a temporary index or search on the fly for this subset
-            # For simplicity, let's search the full index and then intersect
-            search_results_notes = self.search_index.search(search_query)
-            
-            # Intersect search_results_notes with notes_to_filter
-            search_result_filepaths = {note.filepath for note in search_results_notes}
-            final_filtered_notes = [note for note in notes_to_filter if note.filepath in search_result_filepaths]
+            tag_paths = self.search_index.filter_by_tag_paths(tag_filter)
+            final_paths = tag_paths if final_paths is None else tag_paths & final_paths
+
+        if final_paths is None: # "All Notes" and no search query
+            final_filtered_notes = self.notes_list_data[:] # Work on a copy
         else:
-            final_filtered_notes = notes_to_filter
-        
-        final_filtered_notes.sort(key=lambda n: (n.updated or n.created or ""), reverse=True)
+            # notes_list_data is kept sorted by date, so one ordered pass needs no re-sort.
+            # Paths of notes deleted while a worker was searching simply never match.
+            final_filtered_notes = [note for note in self.notes_list_data if note.filepath in final_paths]
+
+        self._filter_cache[self._filter_cache_key(search_query)] = final_filtered_notes
+        if len(self._filter_cache) > FILTER_CACHE_SIZE:
+            self._filter_cache.popitem(last=False) # Evict the least recently used result
         self.update_note_list_display(final_filtered_notes)
 
 
@@ -450,22 +765,19 @@ class MainWindow(QMainWindow):
 
     def _find_note_by_filepath(self, filepath: str) -> Note | None:
         """Finds a note in self.notes_list_data by its filepath."""
-        for note in self.notes_list_data:
-            if note.filepath == filepath:
-                return note
-        return None
+        return self._notes_by_path.get(filepath)
 
-    def on_note_selected(self, current_item: QListWidgetItem, previous_item: QListWidgetItem):
+    def on_note_selected(self, current: QModelIndex, previous: QModelIndex):
         """Handles selection change in the notes list."""
         if self.check_unsaved_changes(): # Prompts to save if needed
-            # If user cancels save dialog, current_item might be None or selection aborted
-            if not current_item: # Selection was likely cancelled or cleared
-                if previous_item: # Try to reselect previous item
-                    self.notes_list_widget.setCurrentItem(previous_item)
+            # If user cancels save dialog, current might be invalid or selection aborted
+            if not current.isValid(): # Selection was likely cancelled or cleared
+                if previous.isValid(): # Try to reselect previous item
+                    self.notes_list_widget.setCurrentIndex(previous)
                 return 
         
-        if current_item:
-            filepath = current_item.data(Qt.ItemDataRole.UserRole)
+        if current.isValid():
+            filepath = current.data(Qt.ItemDataRole.UserRole)
             note = self._find_note_by_filepath(filepath)
             if note:
                 self.load_note_into_editor(note)
@@ -480,7 +792,10 @@ class MainWindow(QMainWindow):
     def load_note_into_editor(self, note: Note):
         """Loads a note's content into the editor and preview."""
         self.current_note_filepath = note.filepath
+        self._last_editor_text = note.content # So loading the note is not seen as an edit
         self.markdown_editor.set_markdown_text(note.content) # This should not trigger content_changed immediately
+        # Relative image paths in the note resolve against its folder
+        self.markdown_viewer.set_base_url(QUrl.fromLocalFile(os.path.dirname(note.filepath) + "/"))
         self.markdown_viewer.set_markdown(note.content)
         self.unsaved_changes = False
         self.update_action_states()
@@ -488,6 +803,8 @@ class MainWindow(QMainWindow):
         self.statusBar.showMessage(f"Loaded: {note.title}", 2000)
 
     def clear_editor_and_preview(self):
+        self._flush_pending_autosave() # Stops the timer only once its pending save is written
+        self._last_editor_text = ""
         self.markdown_editor.clear()
         self.markdown_viewer.set_markdown("<!-- No note selected or content empty -->") # Clear preview
         self.current_note_filepath = None
@@ -496,15 +813,24 @@ class MainWindow(QMainWindow):
         self.update_action_states()
 
     def on_editor_content_changed(self, markdown_text: str):
-        """Handles content changes from the editor (debounced)."""
-        self.markdown_viewer.set_markdown(markdown_text)
+        """Handles content changes from the editor (throttled)."""
+        if markdown_text == self._last_editor_text:
+            return # e.g. an edit that was undone before the throttled signal fired
+        self._last_editor_text = markdown_text
+        self.markdown_viewer.queue_markdown(markdown_text) # Renders once the changes pause
         if self.current_note_filepath:
             self.unsaved_changes = True
             self.update_action_states()
             # Auto-save logic (can be made configurable)
-            if app_settings.get("auto_save_interval", 0) > 0: # If auto-save enabled
-                 # For now, direct save. Could use another QTimer here.
-                self.save_current_note(auto_save=True)
+            auto_save_interval = app_settings.get("auto_save_interval", 0) # milliseconds
+            if auto_save_interval > 0: # If auto-save enabled
+                self._autosave_timer.start(auto_save_interval)
+
+    def _flush_pending_autosave(self):
+        """Runs a scheduled auto-save now, e.g. before switching notes or closing."""
+        if self._autosave_timer.isActive():
+            self._autosave_timer.stop()
+            self.save_current_note(auto_save=True)
 
     def save_current_note(self, auto_save=False):
         """Saves the content of the currently edited note."""
@@ -527,15 +853,31 @@ class MainWindow(QMainWindow):
 
         note.content = current_content
         note.updated = get_current_timestamp() # Update timestamp
+        note._cached_subtitle = None
+
+        if auto_save:
+            # Coalesced and written on the background writer thread
+            self.note_writer.enqueue(note)
+            saved = True
+        else:
+            saved = save_note(note, durable=True) # An explicit save waits for the disk; auto-saves don't
 
-        if save_note(note):
+        if saved:
+            self.search_index.update(note)
+            self._invalidate_filter_cache()
             self.unsaved_changes = False
             self.update_action_states()
             if not auto_save: self.statusBar.showMessage(f"Note '{note.title}' saved.", 2000)
             
             # Update note in the list and re-sort/re-filter if necessary
-            self.notes_list_data.sort(key=lambda n: (n.updated or n.created or ""), reverse=True)
-            self.filter_notes_list() # This will re-select the current item too
+            self.notes_list_data.remove(note) # Its updated timestamp moved it to the front
+            bisect.insort(self.notes_list_data, note)
+            if auto_save:
+                # Only this row's timestamp changed; repaint it rather than refiltering mid-typing.
+                # The list picks up the new order on the next filter.
+                self.notes_model.refresh_note(note.filepath)
+            else:
+                self.filter_notes_list() # This will re-select the current item too
             return True
         else:
             if not auto_save: QMessageBox.critical(self, "Save Error", f"Could not save note: {note.filepath}")
@@ -555,19 +897,16 @@ class MainWindow(QMainWindow):
 
             new_note = create_new_note(notes_dir, title, tags=["new"], content=f"# {title}\n\nStart writing here...")
             if new_note:
-                self.notes_list_data.append(new_note)
-                self.search_index.build_index(self.notes_list_data) # Rebuild or update index
+                bisect.insort(self.notes_list_data, new_note) # Keeps the list sorted newest first
+                self._notes_by_path[new_note.filepath] = new_note
+                self.search_index.add(new_note)
+                self._invalidate_filter_cache()
                 
-                self.notes_list_data.sort(key=lambda n: (n.updated or n.created or ""), reverse=True)
                 self.filter_notes_list() # This will update display
                 self.update_tag_filter_panel() # Update tags
 
                 # Select the new note in the list
-                for i in range(self.notes_list_widget.count()):
-                    item = self.notes_list_widget.item(i)
-                    if item.data(Qt.ItemDataRole.UserRole) == new_note.filepath:
-                        self.notes_list_widget.setCurrentItem(item) # This triggers on_note_selected
-                        break
+                self._select_note_in_list(new_note.filepath) # This triggers on_note_selected
                 
                 self.status_label_note_count.setText(f"Notes: {len(self.notes_list_data)}")
                 self.statusBar.showMessage(f"Created new note: {title}", 2000)
@@ -594,9 +933,14 @@ class MainWindow(QMainWindow):
                                      QMessageBox.StandardButton.No)
 
         if reply == QMessageBox.StandardButton.Yes:
+            # Make sure a queued auto-save cannot recreate the file after it is deleted
+            self.note_writer.discard(note_to_delete.filepath)
+            self.note_writer.flush()
             if delete_note_file(note_to_delete.filepath):
                 self.notes_list_data.remove(note_to_delete)
-                self.search_index.build_index(self.notes_list_data) # Rebuild index
+                self._notes_by_path.pop(note_to_delete.filepath, None)
+                self.search_index.remove(note_to_delete.filepath)
+                self._invalidate_filter_cache()
                 
                 self.clear_editor_and_preview() # Clear editor as note is gone
                 self.current_note_filepath = None # Crucial
@@ -628,16 +972,9 @@ class MainWindow(QMainWindow):
 
         if filepath:
             try:
-                # Use the viewer's rendering logic to get the full HTML
-                # This requires viewer to expose a method to get the full styled HTML
-                # For now, let's assume viewer.get_full_html_for_export(markdown_content)
-                # Or, reconstruct it here:
+                # Same rendering (and render cache) as the preview
                 is_dark = app_settings.get("theme") == "dark"
-                html_content = self.markdown_viewer._wrap_html_content( # Accessing protected method for now
-                    markdown.markdown(note.content, extensions=['fenced_code', 'codehilite', 'tables', 'nl2br', 'extra'],
-                                      extension_configs={'codehilite': {'css_class': 'codehilite'}}),
-                    is_dark_theme=is_dark
-                )
+                html_content = self.markdown_viewer.render_full_html(note.content, is_dark_theme=is_dark)
 
                 with open(filepath, 'w', encoding='utf-8') as f:
                     f.write(html_content)
@@ -668,7 +1005,7 @@ class MainWindow(QMainWindow):
             if app_settings.get("font_size") != new_settings["font_size"]:
                  app_settings.set("font_size", new_settings["font_size"])
             
-            app_settings.save_settings()
+            app_settings.schedule_save() # Written once, after the burst of setters
             self.apply_settings_to_ui() # Re-apply all settings to UI
             self.statusBar.showMessage("Settings updated.", 2000)
 
@@ -689,6 +1026,7 @@ class MainWindow(QMainWindow):
         Checks for unsaved changes. If found, prompts user to save.
         Returns True if user cancels action, False otherwise (saved or discarded).
         """
+        self._flush_pending_autosave() # Auto-saved changes need no prompt
         if self.unsaved_changes and self.current_note_filepath:
             note = self._find_note_by_filepath(self.current_note_filepath)
             note_title = note.title if note else "current note"
@@ -717,6 +1055,9 @@ class MainWindow(QMainWindow):
         app_settings.set("splitter_sizes_main", self.main_splitter.sizes())
         app_settings.set("splitter_sizes_editor", self.editor_viewer_splitter.sizes())
         app_settings.save_settings()
+        if self._scan_thread is not None:
+            self._scan_thread.wait() # Don't destroy a QThread that is still scanning
+        self.note_writer.close() # Writes any pending auto-saves
         event.accept()
 
 
@@ -745,11 +1086,16 @@ def main():
     if not os.path.exists(app_settings.config_path):
         app_settings.save_settings() # Ensure default settings file is created on first run
 
+    # The preview's browser cache only holds resources of the open notes: keep it in
+    # memory instead of paying for disk cache I/O. Must be set before the first view exists.
+    QWebEngineProfile.defaultProfile().setHttpCacheType(QWebEngineProfile.HttpCacheType.MemoryHttpCache)
+
+    # The window builds its MarkdownViewer up front, which also loads the placeholder page:
+    # Chromium's processes and fonts start now rather than when the first note is opened.
     main_window = MainWindow()
     sys.exit(app.exec())
 
 if __name__ == '__main__':
     # Need to import these if running gui_main.py directly and SettingsDialog etc are in same file
     from PyQt6.QtWidgets import QLineEdit, QPushButton, QComboBox, QSpinBox, QDialogButtonBox, QDialog
-    import markdown # Ensure markdown is importable here for export
     main()
@@ -3,29 +3,241 @@ In-memory index of titles, tags, and full text for instant search.
 """
 from .file_manager import Note # Assuming Note class is defined in file_manager
 import re
+import sys
+import bisect
+import itertools
+import functools
+import threading
+
+# Optional: with numba (and numpy) installed, the substring fallback over large corpora runs as
+# a compiled, multi-threaded scan instead of a Python-level loop over the notes.
+try:
+    import numpy as np
+    from numba import njit, prange
+except ImportError:
+    np = None
+
+# Optional: with pyroaring installed, posting lists are compressed Roaring bitmaps of doc ids,
+# several times smaller than sets of ints and intersected in bulk.
+try:
+    from pyroaring import BitMap as _Postings, FrozenBitMap as _FrozenPostings
+except ImportError:
+    _Postings = set
+    _FrozenPostings = frozenset
+
+_TOKEN_RE = re.compile(r"\w+") # Words as indexed; query terms made only of these use the inverted index
+_TERMINAL = None # Prefix trie key marking that a token ends at this node (maps to the token)
+SEARCH_CACHE_SIZE = 128 # Distinct (terms, fields) results kept per index
+def _fold(text: str) -> str:
+    """
+    Case-folds text for indexing and queries alike. str.isascii() is O(1), and
+    ASCII text (most notes) takes lower()'s ASCII fast path, which is exactly what
+    casefold() would return. Other text is casefolded, so e.g. "STRASSE" finds
+    "straße" and final sigma matches sigma, which lower() does not do.
+    """
+    return text.lower() if text.isascii() else text.casefold()
+
+BLOB_SCAN_MIN_NOTES = 1000 # From this many notes, substring scans search one joined blob per field
+JIT_SCAN_MIN_NOTES = 2000 # Below this, dispatching to the compiled scan costs more than it saves
+
+if np is not None:
+    @njit(cache=True, parallel=True)
+    def _scan_rows(blob, offsets, rows, needle):
+        """
+        For each row index in rows, whether blob[offsets[row]:offsets[row + 1]]
+        contains needle. Boyer-Moore-Horspool per row, rows scanned in parallel.
+        """
+        m = needle.shape[0]
+        skip = np.full(256, m, dtype=np.int64)
+        for i in range(m - 1):
+            skip[needle[i]] = m - 1 - i
+        found = np.zeros(rows.shape[0], dtype=np.bool_)
+        for r in prange(rows.shape[0]):
+            row = rows[r]
+            pos = offsets[row]
+            last = offsets[row + 1] - m
+            while pos <= last:
+                j = m - 1
+                while j >= 0 and blob[pos + j] == needle[j]:
+                    j -= 1
+                if j < 0:
+                    found[r] = True
+                    break
+                pos += skip[blob[pos + m - 1]]
+        return found
+else:
+    _scan_rows = None
 
 class SearchIndex:
+    """
+    Inverted index over note titles, tags and content.
+
+    Each field maps a case-folded token to the set of doc ids (small ints,
+    one per indexed filepath) of the notes containing it, so a query term is resolved against the vocabulary
+    rather than by scanning every note's text. Word terms match the words
+    they are a prefix of ("ros" finds "roses"), looked up in a prefix trie
+    of the vocabulary, so search-as-you-type costs O(len(term)) plus the
+    matching completions.
+    """
     def __init__(self):
-        self.notes_data = [] # List of dictionaries or Note objects
-        self.index = {} # Could be more sophisticated (e.g., inverted index)
+        # Searches run on worker threads (gui_main.FilterJob) while the GUI thread updates the
+        # index: both hold this lock, so a search never sees a half-applied update
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.notes_data = {} # filepath -> entry dict, in indexing order
+        # Postings hold ints rather than filepaths: cheaper to hash, compare and intersect, and
+        # assigned in indexing order, so sorting matches puts them in index order
+        self._doc_ids = {} # filepath -> doc id, kept for as long as the filepath stays indexed
+        self._docs = {} # doc id -> entry dict
+        self._next_doc_id = itertools.count()
+        self.title_idx = {} # token -> set of doc ids (a pyroaring BitMap if available)
+        self.tag_idx = {}
+        self.content_idx = {}
+        self.tag_members = {} # case-folded tag -> set of doc ids, for filter_by_tag
+        self.note_tokens = {} # filepath -> [(field index, frozenset of its tokens)], for unindexing
+        self.tag_counts = {} # original-case tag -> number of indexed notes carrying it, for get_all_tags
+        # Nested dicts, one level per character, over every token ever indexed; tokens that
+        # have since left all fields are skipped at lookup and dropped on the next build_index
+        self.prefix_trie = {}
+        # Results of recent queries, keyed by (terms, fields, version). Every mutation bumps the
+        # version, so a search that raced with an update can't store results under the new one.
+        self._version = 0
+        self._scan_blobs = None # (version, doc ids, row_of, {field key: (blob, offsets)}), see _get_scan_blobs
+        self._cached_matches = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._compute_matches)
+
+    def _invalidate_results(self):
+        self._version += 1
+        self._cached_matches.cache_clear()
 
     def build_index(self, notes: list[Note]):
-        """Builds or rebuilds the search index from a list of Note objects."""
-        self.notes_data = []
-        self.index = {} # Clear existing index
-
-        for i, note in enumerate(notes):
-            # Store a reference or key to the original note.
-            # For simplicity, we store the note object itself, but an ID could be better.
-            self.notes_data.append({
-                'id': note.filepath, # Use filepath as a unique ID
-                'title': note.title.lower(),
-                'tags': [tag.lower() for tag in note.tags],
-                'content': note.content.lower(), # Full text content for searching
-                'original_note': note # Reference to the original Note object
-            })
+        """
+        Builds or rebuilds the search index from a list of Note objects.
+        Entries are keyed by filepath, so the index holds each note once (a
+        repeated filepath replaces the earlier entry) and searches never
+        need to de-duplicate their results.
+        """
+        with self._lock:
+            self._reset() # Clear existing index
+
+            for note in notes:
+                self.update(note)
         print(f"Search index built with {len(self.notes_data)} notes.")
 
+    def _make_entry(self, note: Note) -> tuple[dict, tuple]:
+        """
+        Builds the searchable entry for a single note, plus the (field index,
+        case-folded text) pairs to tokenize it with. The entry keeps only the
+        UTF-8 bytes of its text: the str forms are needed once, for indexing.
+        """
+        # The entry keeps the note object itself; postings refer to it by entry['doc'] (set by update).
+        title = _fold(note.title)
+        # Interned: the same few tags repeat across most notes, and interned keys share one
+        # string (and its cached hash) between every entry, posting dict and tag_members
+        tags = [sys.intern(_fold(tag)) for tag in note.tags]
+        tags_text = " ".join(tags)
+        # Unloaded bodies are read for indexing only, so the Note itself stays
+        # metadata-only until the note is opened.
+        content = _fold(note.read_content())
+        entry = {
+            'id': note.filepath, # Use filepath as a unique ID
+            'tags': tags,
+            # As indexed: the tag counts must be decremented by these even if note.tags changes later
+            'original_tags': frozenset(note.tags),
+            # Encoded once for the substring fallback, so queries build no strings per note
+            'title_bytes': title.encode('utf-8'),
+            'tags_bytes': tags_text.encode('utf-8'),
+            'content': content.encode('utf-8'),
+            'original_note': note # Reference to the original Note object
+        }
+        return entry, ((self.title_idx, title), (self.tag_idx, tags_text), (self.content_idx, content))
+
+    def _index_entry(self, entry: dict, field_texts):
+        filepath = entry['id']
+        doc = entry['doc']
+        indexed = []
+        for idx, text in field_texts:
+            # One shared string per distinct token across the postings and every note_tokens set
+            tokens = frozenset(map(sys.intern, set(_TOKEN_RE.findall(text))))
+            for token in tokens:
+                postings = idx.get(token)
+                if postings is None:
+                    idx[token] = postings = _Postings()
+                    self._trie_insert(token)
+                postings.add(doc)
+            indexed.append((idx, tokens))
+        self.note_tokens[filepath] = indexed
+        for tag in entry['tags']:
+            members = self.tag_members.get(tag)
+            if members is None:
+                self.tag_members[tag] = members = _Postings()
+            members.add(doc)
+        tag_counts = self.tag_counts
+        for tag in entry['original_tags']:
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+
+    def _unindex_entry(self, entry: dict):
+        doc = entry['doc']
+        # Only the postings this note was added to, without tokenizing its text again
+        for idx, tokens in self.note_tokens.pop(entry['id'], ()):
+            for token in tokens:
+                postings = idx.get(token)
+                if postings is not None:
+                    postings.discard(doc)
+                    if not postings:
+                        del idx[token]
+        for tag in entry['tags']:
+            members = self.tag_members.get(tag)
+            if members is not None:
+                members.discard(doc)
+                if not members:
+                    del self.tag_members[tag]
+        tag_counts = self.tag_counts
+        for tag in entry['original_tags']:
+            count = tag_counts.get(tag, 0) - 1
+            if count > 0:
+                tag_counts[tag] = count
+            else:
+                tag_counts.pop(tag, None)
+
+    def add(self, note: Note):
+        """Adds a single note to the index (updates it if already indexed)."""
+        self.update(note)
+
+    def remove(self, filepath: str) -> bool:
+        """Removes a note from the index. Returns False if it was not indexed."""
+        with self._lock:
+            entry = self.notes_data.pop(filepath, None)
+            if entry is None:
+                return False
+            self._unindex_entry(entry)
+            del self._docs[entry['doc']]
+            del self._doc_ids[filepath]
+            self._invalidate_results()
+            return True
+
+    def update(self, note: Note):
+        """Re-indexes a single note after it changed, adding it if it is new."""
+        entry, field_texts = self._make_entry(note)
+        with self._lock:
+            old_entry = self.notes_data.get(note.filepath)
+            if old_entry is None:
+                entry['doc'] = self._doc_ids[note.filepath] = next(self._next_doc_id)
+            else:
+                entry['doc'] = old_entry['doc'] # Keeps its place in the index order
+                self._unindex_entry(old_entry)
+            self.notes_data[note.filepath] = entry
+            self._docs[entry['doc']] = entry
+            self._index_entry(entry, field_texts)
+            self._invalidate_results()
+
+    # Both skip doc ids removed meanwhile: searches run on worker threads while the GUI updates the index
+    def _in_index_order(self, docs) -> list[Note]:
+        return [entry['original_note'] for entry in map(self._docs.get, sorted(docs)) if entry is not None]
+
+    def _filepaths(self, docs) -> set[str]:
+        return {entry['id'] for entry in map(self._docs.get, docs) if entry is not None}
 
     def search(self, query: str, search_title=True, search_tags=True, search_content=True) -> list[Note]:
         """
@@ -34,68 +246,191 @@ class SearchIndex:
         """
         if not query.strip():
             # If query is empty, return all notes (or handle as no results)
-            return [item['original_note'] for item in self.notes_data]
-
-        query_lower = query.lower()
-        results = []
-        seen_filepaths = set() # To avoid duplicate results if a note matches multiple criteria
-
-        # Simple keyword matching. Can be improved with more advanced techniques
-        # like TF-IDF, fuzzy matching, or splitting query into multiple terms.
-        # For now, we treat the query as a single phrase or set of keywords.
-        # Consider splitting query by space and matching all terms (AND) or any term (OR).
-        query_terms = query_lower.split()
-
-
-        for item in self.notes_data:
-            match_score = 0
-            text_to_search = []
-
-            if search_title:
-                text_to_search.append(item['title'])
-            if search_tags:
-                text_to_search.extend(item['tags']) # item['tags'] is already a list of lowercased strings
-            if search_content:
-                text_to_search.append(item['content'])
-
-            # Combine all searchable text into one string for simple matching
-            # A more refined approach would weight matches in title/tags higher.
-            combined_text = " ".join(text_to_search)
-
-            # Match all terms (AND logic)
-            all_terms_match = True
-            for term in query_terms:
-                if term not in combined_text:
-                    all_terms_match = False
-                    break
-            
-            if all_terms_match:
-                if item['id'] not in seen_filepaths:
-                    results.append(item['original_note'])
-                    seen_filepaths.add(item['id'])
-        
-        # Could sort results by relevance if match_score was implemented
-        return results
+            return [item['original_note'] for item in tuple(self.notes_data.values())]
+        with self._lock:
+            return self._in_index_order(self._cached_matches(frozenset(_fold(query).split()), search_title,
+                                                             search_tags, search_content, self._version))
+
+    def search_paths(self, query: str, search_title=True, search_tags=True, search_content=True) -> set[str]:
+        """Like search(), but returns the set of matching note filepaths."""
+        if not query.strip():
+            return set(self._doc_ids)
+        with self._lock:
+            return self._filepaths(self._cached_matches(frozenset(_fold(query).split()), search_title,
+                                                        search_tags, search_content, self._version))
+
+    def _compute_matches(self, terms: frozenset, search_title: bool, search_tags: bool, search_content: bool,
+                         version: int) -> frozenset:
+        """Cached by _cached_matches; version only keys the cache to the index state."""
+        return _FrozenPostings(self._matching_docs(terms, search_title, search_tags, search_content))
+
+    def _matching_docs(self, terms, search_title: bool, search_tags: bool, search_content: bool) -> set[int]:
+        """Returns the doc ids of the notes matching all case-folded terms of a non-empty query (AND logic)."""
+        fields = [idx for idx, enabled in ((self.title_idx, search_title), (self.tag_idx, search_tags),
+                                           (self.content_idx, search_content)) if enabled]
+        word_terms = []
+        other_terms = []
+        for term in terms:
+            (word_terms if _TOKEN_RE.fullmatch(term) else other_terms).append(term)
+
+        # Intersect the rarest word terms first, so the running result shrinks as fast as possible
+        postings = sorted((self._term_postings(term, fields) for term in word_terms), key=len)
+        matches = None
+        for term_matches in postings:
+            matches = term_matches if matches is None else matches & term_matches
+            if not matches:
+                return set()
+
+        # Punctuation etc. never appears inside a token, so check the text itself, but only
+        # in the notes still matching; longer terms are likely rarer, so try them first
+        for term in sorted(other_terms, key=len, reverse=True):
+            matches = self._substring_matches(term.encode('utf-8'), search_title, search_tags, search_content, matches)
+            if not matches:
+                return set()
+        return matches
+
+    def _term_postings(self, term: str, fields: list[dict]) -> set[int]:
+        """Union of the postings of every token starting with the term, across the given fields."""
+        matches = _Postings()
+        for token in self._trie_completions(term):
+            for idx in fields:
+                postings = idx.get(token)
+                if postings:
+                    matches |= postings
+        return matches
+
+    def _trie_insert(self, token: str):
+        node = self.prefix_trie
+        for char in token:
+            child = node.get(char)
+            if child is None:
+                node[char] = child = {}
+            node = child
+        node[_TERMINAL] = token
+
+    def _trie_completions(self, prefix: str) -> list[str]:
+        """Returns every indexed token that starts with prefix (including prefix itself)."""
+        node = self.prefix_trie
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        tokens = []
+        stack = [node]
+        while stack:
+            # Snapshot each node: searches run on worker threads while the GUI may update the index
+            for key, child in tuple(stack.pop().items()):
+                if key is _TERMINAL:
+                    tokens.append(child)
+                else:
+                    stack.append(child)
+        return tokens
+
+    def _substring_matches(self, term: bytes, search_title: bool, search_tags: bool, search_content: bool,
+                           candidates: set[int] | None) -> set[int]:
+        """
+        Doc ids of the notes whose searchable text contains the (UTF-8 encoded) term,
+        limited to candidates if given. Matching UTF-8 bytes is equivalent to matching
+        the text, and bytes.find is CPython's fast two-way/horspool search.
+        """
+        # Query terms never contain whitespace, so a match can't span the space that used to join
+        # the fields: checking each precomputed field is the same as checking their concatenation.
+        fields = [key for key, enabled in (('title_bytes', search_title), ('tags_bytes', search_tags),
+                                           ('content', search_content)) if enabled]
+        count = len(self._docs) if candidates is None else len(candidates)
+        if _scan_rows is not None and count >= JIT_SCAN_MIN_NOTES:
+            return self._substring_matches_jit(term, fields, candidates)
+        if count >= BLOB_SCAN_MIN_NOTES:
+            return self._substring_matches_blob(term, fields, candidates)
+        docs = self._docs
+        entries = tuple(docs.values()) if candidates is None else \
+            [entry for entry in map(docs.get, candidates) if entry is not None]
+        return {item['doc'] for item in entries if any(term in item[key] for key in fields)}
+
+    def _substring_matches_blob(self, term: bytes, fields: list[str], candidates: set[int] | None) -> set[int]:
+        """
+        _substring_matches via bytes.find over each field's joined blob: the C-level
+        search skips everything between hits, so Python only runs once per matching
+        note rather than once per note. bytes.find holds the GIL, so this is faster
+        than splitting the loop across a thread pool.
+        """
+        row_docs, _, blobs = self._get_scan_blobs()
+        rows = set()
+        for key in fields:
+            blob, offsets = blobs[key][:2]
+            pos = blob.find(term)
+            while pos >= 0:
+                # Notes are joined by b"\n", which no term contains: a hit lies within one note
+                row = bisect.bisect_right(offsets, pos) - 1
+                rows.add(row)
+                pos = blob.find(term, offsets[row + 1])
+        docs = self._docs
+        matches = {row_docs[row] for row in rows}
+        if candidates is not None:
+            return {doc for doc in matches if doc in candidates} # candidates may be a BitMap
+        return {doc for doc in matches if doc in docs}
+
+    def _substring_matches_jit(self, term: bytes, fields: list[str], candidates: set[int] | None) -> set[int]:
+        """_substring_matches via the compiled _scan_rows, over per-field blobs of all notes."""
+        row_docs, row_of, blobs = self._get_scan_blobs()
+        if candidates is None:
+            rows = np.arange(len(row_docs), dtype=np.int64)
+        else:
+            rows = np.fromiter((row_of[doc] for doc in candidates if doc in row_of), dtype=np.int64)
+        needle = np.frombuffer(term, dtype=np.uint8)
+        found = np.zeros(rows.shape[0], dtype=np.bool_)
+        for key in fields:
+            blob, offsets = blobs[key][2:]
+            found |= _scan_rows(blob, offsets, rows, needle)
+        docs = self._docs
+        return {row_docs[row] for row in rows[found].tolist() if row_docs[row] in docs}
+
+    def _get_scan_blobs(self):
+        """
+        Each field's bytes for all notes, joined by b"\n" into one blob with the
+        start offset of every row (plus the blob length), and with numba the
+        same as numpy arrays for _scan_rows. Rebuilt on the first scan after
+        the index changed.
+        """
+        version = self._version
+        cached = self._scan_blobs
+        if cached is not None and cached[0] == version:
+            return cached[1:]
+        entries = tuple(self._docs.values())
+        row_docs = [item['doc'] for item in entries]
+        row_of = {doc: row for row, doc in enumerate(row_docs)}
+        blobs = {}
+        for key in ('title_bytes', 'tags_bytes', 'content'):
+            parts = [item[key] for item in entries]
+            blob = b"\n".join(parts)
+            offsets = [0]
+            start = 0
+            for part in parts:
+                start += len(part) + 1
+                offsets.append(start)
+            offsets[-1] = len(blob) # No separator after the last row
+            if np is not None:
+                blobs[key] = (blob, offsets, np.frombuffer(blob, dtype=np.uint8), np.array(offsets, dtype=np.int64))
+            else:
+                blobs[key] = (blob, offsets)
+        self._scan_blobs = (version, row_docs, row_of, blobs)
+        return row_docs, row_of, blobs
 
     def filter_by_tag(self, tag: str) -> list[Note]:
         """Filters notes by a specific tag."""
         if not tag.strip():
-            return [item['original_note'] for item in self.notes_data]
-
-        tag_lower = tag.lower()
-        results = []
-        for item in self.notes_data:
-            if tag_lower in item['tags']:
-                results.append(item['original_note'])
-        return results
+            return [item['original_note'] for item in tuple(self.notes_data.values())]
+        return self._in_index_order(tuple(self.tag_members.get(sys.intern(_fold(tag)), ())))
+
+    def filter_by_tag_paths(self, tag: str) -> set[str]:
+        """Like filter_by_tag(), but returns the set of matching note filepaths."""
+        if not tag.strip():
+            return set(self._doc_ids)
+        return self._filepaths(tuple(self.tag_members.get(sys.intern(_fold(tag)), ())))
     
     def get_all_tags(self) -> list[str]:
-        """Returns a sorted list of unique tags from all notes."""
-        all_tags = set()
-        for item in self.notes_data:
-            for tag in item['original_note'].tags: # Use original tags for case preservation if desired
-                all_tags.add(tag)
-        return sorted(list(all_tags))
+        """Returns a sorted list of unique tags from all notes (original case preserved)."""
+        return sorted(tuple(self.tag_counts))
 
 
 if __name__ == '__main__':
@@ -8,6 +8,13 @@ Settings are typically stored in a JSON or INI file in a user-specific config di
 """
 import json
 import os
+from types import MappingProxyType
+
+# orjson is an optional, much faster drop-in for reading/writing the settings file
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Determine OS-specific config directory
 if os.name == 'nt': # Windows
@@ -17,7 +24,7 @@ else: # macOS, Linux
 
 CONFIG_FILE_PATH = os.path.join(APP_CONFIG_DIR, 'settings.json')
 
-DEFAULT_SETTINGS = {
+DEFAULT_SETTINGS = MappingProxyType({ # Read-only: instances merge their own dict on top
     "notes_folder": os.path.join(os.getenv('HOME') or os.getenv('USERPROFILE'), 'MarkdownNotebook', 'Notes'),
     "font_size": 12, # Editor font size
     "theme": "light", # "light" or "dark"
@@ -27,51 +34,95 @@ DEFAULT_SETTINGS = {
     "window_height": 700,
     "splitter_sizes_main": [250, 750], # Note list, editor/viewer area
     "splitter_sizes_editor": [500, 500] # Editor, preview
-}
+})
+_DEFAULT_KEYS = frozenset(DEFAULT_SETTINGS)
+
+SAVE_COALESCE_MS = 500 # schedule_save() writes at most once per this window
 
 class AppSettings:
     def __init__(self, config_path=CONFIG_FILE_PATH):
         self.config_path = config_path
-        self.settings = DEFAULT_SETTINGS.copy() # Start with defaults
+        self._config_dir = os.path.dirname(config_path)
+        self._dir_ensured = False # Set once the config directory is known to exist
+        self.settings = dict(DEFAULT_SETTINGS) # Start with defaults
+        self._dirty = False # True while settings differ from what was last written
+        self._save_scheduled = False
         self._load_settings()
 
     def _load_settings(self):
         """Loads settings from the config file."""
         if os.path.exists(self.config_path):
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    loaded_settings = json.load(f)
-                    # Merge loaded settings with defaults to ensure all keys are present
-                    # and new default keys are added if the config file is old.
-                    for key in DEFAULT_SETTINGS:
-                        if key in loaded_settings:
-                            self.settings[key] = loaded_settings[key]
+                with open(self.config_path, 'rb') as f:
+                    data = f.read()
+                # orjson.JSONDecodeError subclasses json.JSONDecodeError
+                loaded_settings = orjson.loads(data) if orjson is not None else json.loads(data)
+                # Merge loaded settings with defaults to ensure all keys are present
+                # and new default keys are added if the config file is old.
+                if isinstance(loaded_settings, dict):
+                    self.settings = DEFAULT_SETTINGS | {key: value for key, value in loaded_settings.items()
+                                                        if key in _DEFAULT_KEYS}
             except (json.JSONDecodeError, IOError) as e:
                 print(f"Error loading settings from {self.config_path}: {e}. Using defaults.")
-                self.settings = DEFAULT_SETTINGS.copy() # Reset to defaults on error
+                self.settings = dict(DEFAULT_SETTINGS) # Reset to defaults on error
         else:
             # If no config file, use defaults and save them to create the file.
             print(f"No settings file found at {self.config_path}. Creating with defaults.")
+            self._dirty = True
             self.save_settings() # Save defaults if file doesn't exist
 
     def save_settings(self):
-        """Saves the current settings to the config file."""
+        """Saves the current settings to the config file, if anything changed since the last save."""
+        if not self._dirty:
+            return
         try:
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, indent=4)
+            if not self._dir_ensured:
+                if self._config_dir:
+                    os.makedirs(self._config_dir, exist_ok=True)
+                self._dir_ensured = True
+            if orjson is not None:
+                with open(self.config_path, 'wb') as f:
+                    f.write(orjson.dumps(self.settings, option=orjson.OPT_INDENT_2))
+            else:
+                with open(self.config_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.settings, f, indent=4)
+            self._dirty = False
         except IOError as e:
+            self._dir_ensured = False # The directory may have been removed; recreate it next time
             print(f"Error saving settings to {self.config_path}: {e}")
 
+    def schedule_save(self):
+        """
+        Saves the settings once the current burst of changes is over: every call
+        within SAVE_COALESCE_MS shares a single write. Saves immediately when no
+        Qt event loop is available to run the timer.
+        """
+        if self._save_scheduled:
+            return
+        try:
+            from PyQt6.QtCore import QCoreApplication, QTimer
+        except ImportError:
+            QCoreApplication = None
+        if QCoreApplication is None or QCoreApplication.instance() is None:
+            self.save_settings()
+            return
+        self._save_scheduled = True
+        QTimer.singleShot(SAVE_COALESCE_MS, self._flush_scheduled_save)
+
+    def _flush_scheduled_save(self):
+        self._save_scheduled = False
+        self.save_settings()
+
     def get(self, key, default=None):
         """Gets a setting value by key."""
         return self.settings.get(key, default)
 
     def set(self, key, value):
-        """Sets a setting value by key and saves settings."""
+        """Sets a setting value by key. Call save_settings() or schedule_save() to persist it."""
         if key in self.settings:
-            self.settings[key] = value
-            # self.save_settings() # Consider if saving on every set is desired or in bulk
+            if self.settings[key] != value:
+                self.settings[key] = value
+                self._dirty = True
         else:
             print(f"Warning: Attempting to set unknown setting key '{key}'")
     
@@ -107,6 +158,6 @@ if __name__ == '__main__':
         print(f"- {k}: {v}")
 
     # Reset to defaults for next test run if needed
-    # app_settings.settings = DEFAULT_SETTINGS.copy()
+    # app_settings.settings = dict(DEFAULT_SETTINGS)
     # app_settings.save_settings()
     # print("\nSettings reset to defaults.")
@@ -2,57 +2,369 @@
 Utility functions for YAML parsing, timestamp management, etc.
 """
 import yaml # PyYAML
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
+import time
 import re
+import json
+import copy
+import functools
+import threading
+
+# Prefer the libyaml-backed C loader/dumper; fall back to the pure-Python ones
+# when PyYAML was built without libyaml.
+try:
+    from yaml import CSafeLoader, CSafeDumper
+except ImportError:
+    from yaml import SafeLoader as CSafeLoader, SafeDumper as CSafeDumper
 
 # --- YAML Front-matter ---
-YAML_FRONT_MATTER_REGEX = re.compile(r'^---\s*\n(.*?\n)^---\s*\n', re.DOTALL | re.MULTILINE)
+def _split_front_matter(data) -> tuple[str, str] | tuple[bytes, bytes] | None:
+    """
+    Locates a front-matter block with plain find calls, no regex: the common
+    no-front-matter case costs a single 3-character comparison. Works on str,
+    bytes and read-only mmaps (whose slices are bytes).
+    Returns (header, body), or None if the data has no front-matter.
+    """
+    newline, closing = ('\n', '\n---') if isinstance(data, str) else (b'\n', b'\n---')
+    if data[:3] != closing[1:]:
+        return None
+    first_nl = data.find(newline, 3)
+    if first_nl < 0 or data[3:first_nl].strip():
+        return None
+    pos = first_nl
+    while True:
+        end = data.find(closing, pos)
+        if end < 0:
+            return None
+        line_end = data.find(newline, end + 4)
+        if line_end < 0:
+            return None
+        if not data[end + 4:line_end].strip():
+            return data[first_nl + 1:end + 1], data[line_end + 1:]
+        pos = end + 4
+
+# Plain (unquoted) scalars are only emitted when they cannot be read back as
+# anything but the same string, in block and in flow context.
+_PLAIN_SCALAR_REGEX = re.compile(r'[A-Za-z_][A-Za-z0-9_ .\-]*(?<! )')
+_YAML_RESERVED_WORDS = frozenset(['y', 'n', 'yes', 'no', 'true', 'false', 'on', 'off', 'null'])
+
+_SIMPLE_KEY_LINE_REGEX = re.compile(r'([A-Za-z_][A-Za-z0-9_]*):(?: +(.*))?')
+_SIMPLE_ITEM_LINE_REGEX = re.compile(r'( *)- +(.*)')
+
+def _plain_string(text: str) -> bool:
+    """True if text, as a plain YAML scalar, can only be read back as the same string."""
+    return _PLAIN_SCALAR_REGEX.fullmatch(text) is not None and text.lower() not in _YAML_RESERVED_WORDS
 
-def parse_yaml_front_matter(file_content: str) -> tuple[dict, str]:
+def _scan_quoted(text: str, start: int) -> tuple[str, int] | None:
+    """Reads a single-quoted scalar starting at text[start]; returns (value, end) or None."""
+    parts = []
+    pos = start + 1
+    while True:
+        end = text.find("'", pos)
+        if end < 0:
+            return None
+        parts.append(text[pos:end])
+        if text.startswith("'", end + 1): # '' is an escaped quote
+            parts.append("'")
+            pos = end + 2
+        else:
+            value = "".join(parts)
+            return (value, end + 1) if value.isprintable() else None
+
+# C-accelerated JSON string scanner. JSON's string escapes are a subset of YAML's double-quoted
+# ones and mean the same there, so a double-quoted scalar it reads is what YAML would read.
+_scan_json_string = json.decoder.scanstring
+
+def _scan_double_quoted(text: str, start: int) -> tuple[str, int] | None:
+    """Reads a double-quoted scalar starting at text[start]; returns (value, end) or None."""
+    try:
+        value, end = _scan_json_string(text, start + 1)
+    except ValueError: # Unterminated, or YAML-only escapes like \x41 and \e: left to YAML
+        return None
+    if '\\u' in text[start:end]: # JSON joins \ud83d\ude00 surrogate pairs, YAML may not
+        return None
+    return (value, end) if value.isprintable() else None
+
+def _scan_any_quoted(text: str, start: int) -> tuple[str, int] | None:
+    """Reads the single- or double-quoted scalar starting at text[start]."""
+    if text[start] == "'":
+        return _scan_quoted(text, start)
+    return _scan_double_quoted(text, start)
+
+def _simple_scalar(text: str):
+    """A plain or quoted string scalar; None (not a string) for anything else."""
+    if text.startswith(("'", '"')):
+        scanned = _scan_any_quoted(text, 0)
+        if scanned is not None and scanned[1] == len(text):
+            return scanned[0]
+        return None
+    return text if _plain_string(text) else None
+
+def _simple_flow_list(text: str) -> list | None:
+    """A one-line [a, 'b c', "d"] list of string scalars."""
+    inner = text[1:-1].strip(' ')
+    items = []
+    pos = 0
+    while pos < len(inner):
+        if inner.startswith(("'", '"'), pos):
+            scanned = _scan_any_quoted(inner, pos)
+            if scanned is None:
+                return None
+            item, pos = scanned
+            while inner.startswith(' ', pos):
+                pos += 1
+            if pos < len(inner) and inner[pos] != ',':
+                return None
+        else:
+            end = inner.find(',', pos)
+            if end < 0:
+                end = len(inner)
+            item = inner[pos:end].strip(' ')
+            if not _plain_string(item):
+                return None
+            pos = end
+        items.append(item)
+        if pos < len(inner): # Skip the comma; a trailing one is left to YAML
+            pos += 1
+            while inner.startswith(' ', pos):
+                pos += 1
+            if pos == len(inner):
+                return None
+    return items
+
+def _parse_simple_front_matter(text: str) -> dict | None:
+    """
+    Parses the restricted front-matter notes almost always have: top-level
+    "key: value" lines whose values are plain or quoted strings, flow
+    lists of those, or "- item" block lists. Returns None as soon as a line
+    falls outside that subset (comments, numbers, dates, nesting, ...), so
+    the caller can hand the block to the YAML parser, which would read
+    everything accepted here the same way.
+    """
+    metadata = {}
+    lines = text.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    i = 0
+    while i < len(lines):
+        match = _SIMPLE_KEY_LINE_REGEX.fullmatch(lines[i].rstrip(' '))
+        if match is None or match.group(1).lower() in _YAML_RESERVED_WORDS:
+            return None
+        key, value = match.groups()
+        i += 1
+        if value is None: # Block list on the following lines
+            items = []
+            indent = None
+            while i < len(lines):
+                item_match = _SIMPLE_ITEM_LINE_REGEX.fullmatch(lines[i].rstrip(' '))
+                if item_match is None:
+                    break
+                if indent is None:
+                    indent = item_match.group(1)
+                elif item_match.group(1) != indent:
+                    return None
+                item = _simple_scalar(item_match.group(2))
+                if item is None:
+                    return None
+                items.append(item)
+                i += 1
+            if not items:
+                return None
+            metadata[key] = items
+        elif value.startswith('[') and value.endswith(']'):
+            items = _simple_flow_list(value)
+            if items is None:
+                return None
+            metadata[key] = items
+        else:
+            scalar = _simple_scalar(value)
+            if scalar is None:
+                return None
+            metadata[key] = scalar
+    return metadata
+
+def parse_yaml_front_matter(file_content) -> tuple[dict, str]:
     """
     Parses YAML front-matter from the beginning of a string.
     Returns a tuple: (metadata_dict, content_string_without_front_matter).
     If no front-matter is found, returns ({}, original_content_string).
+    Simple headers are parsed by hand (see _parse_simple_front_matter);
+    the YAML parser only sees the rest. Raw UTF-8 bytes are also accepted:
+    they are split undecoded, and only the header and body are decoded.
+    So is an mmap of the file, whose body is then copied out only once.
     """
-    match = YAML_FRONT_MATTER_REGEX.match(file_content)
-    if match:
-        try:
-            metadata_str = match.group(1)
-            metadata = yaml.safe_load(metadata_str)
-            if not isinstance(metadata, dict): # Ensure it's a dictionary
-                metadata = {}
-            content_after_front_matter = file_content[match.end():]
-            return metadata, content_after_front_matter
-        except yaml.YAMLError:
-            # If YAML parsing fails, treat it as no valid front-matter
-            return {}, file_content
-    return {}, file_content
+    parts = _split_front_matter(file_content)
+    is_bytes = not isinstance(file_content, str)
+    if parts is None:
+        return {}, str(file_content, 'utf-8') if is_bytes else file_content
+    header, body = parts
+    metadata = _load_header_cached(header)
+    if metadata is None:
+        # If YAML parsing fails, treat it as no valid front-matter
+        return {}, str(file_content, 'utf-8') if is_bytes else file_content
+    return metadata, body.decode('utf-8') if is_bytes else body
+
+_HEADER_CACHE_SIZE = 1024
+_header_cache = {} # header str/bytes -> parsed metadata dict, or None if invalid; oldest first
+_header_cache_lock = threading.Lock() # Notes are parsed on the scan thread pool
+
+def _load_header_cached(header: str | bytes) -> dict | None:
+    """
+    Parses a front-matter block, memoized on its exact text: a note is re-read
+    on every open, save and preview reload while its header rarely changes.
+    Returns a fresh copy of the metadata (callers keep and mutate the tags
+    list), or None if the block is not valid YAML.
+    """
+    with _header_cache_lock:
+        cached = _header_cache.get(header, _header_cache)
+    if cached is _header_cache:
+        cached = _load_header(header)
+        with _header_cache_lock:
+            if len(_header_cache) >= _HEADER_CACHE_SIZE:
+                del _header_cache[next(iter(_header_cache))]
+            _header_cache[header] = cached
+    if cached is None:
+        return None
+    if all(type(value) is str or type(value) is list and all(type(item) is str for item in value)
+           for value in cached.values()):
+        return {key: list(value) if type(value) is list else value for key, value in cached.items()}
+    return copy.deepcopy(cached)
+
+def _load_header(header: str | bytes) -> dict | None:
+    try:
+        metadata = _parse_simple_front_matter(header.decode('utf-8') if isinstance(header, bytes) else header)
+    except UnicodeDecodeError:
+        metadata = None
+    try:
+        if metadata is None:
+            metadata = yaml.load(header, Loader=CSafeLoader)
+    except yaml.YAMLError:
+        return None
+    if not isinstance(metadata, dict): # Ensure it's a dictionary
+        metadata = {}
+    return metadata
 
 def generate_yaml_front_matter(metadata: dict) -> str:
     """
     Generates a YAML front-matter string from a dictionary.
     Ensures 'created' and 'updated' timestamps are in ISO format if present.
     """
-    # Convert datetime objects to ISO format strings if they exist
+    # Convert datetime objects and nanosecond timestamps to ISO format strings if they exist
     for key in ['created', 'updated']:
         if key in metadata and isinstance(metadata[key], datetime):
             metadata[key] = metadata[key].isoformat()
+        elif key in metadata and _is_ns_timestamp(metadata[key]):
+            metadata[key] = format_timestamp_iso(metadata[key])
     
     if not metadata:
         return ""
     try:
-        yaml_str = yaml.dump(metadata, sort_keys=False, allow_unicode=True, default_flow_style=False)
+        yaml_str = yaml.dump(metadata, Dumper=CSafeDumper, sort_keys=False, allow_unicode=True, default_flow_style=False)
         return f"---\n{yaml_str}---\n"
     except yaml.YAMLError:
         return "---\n# Error generating YAML\n---\n"
 
+def _yaml_scalar(value) -> str | None:
+    """
+    Formats a string as a single-line YAML scalar, plain or single-quoted.
+    Returns None when the value needs the general YAML emitter.
+    """
+    if not isinstance(value, str):
+        return None
+    if _PLAIN_SCALAR_REGEX.fullmatch(value) and value.lower() not in _YAML_RESERVED_WORDS:
+        return value
+    if value.isprintable():
+        return "'" + value.replace("'", "''") + "'"
+    return None
+
+@functools.lru_cache(maxsize=256)
+def _title_tags_lines(title, tags: tuple) -> str | None:
+    """
+    The title and tags lines of a note's front-matter, or None if they need the
+    general YAML emitter. Memoized: unlike the timestamps, which every save
+    updates, they rarely change between saves of a note.
+    """
+    title_str = _yaml_scalar(title)
+    tag_scalars = [_yaml_scalar(tag) for tag in tags]
+    if title_str is None or None in tag_scalars:
+        return None
+    return f"title: {title_str}\ntags: [{', '.join(tag_scalars)}]\n"
+
+def generate_note_front_matter(title, tags, created, updated) -> str:
+    """
+    Generates the front-matter for the fixed note schema (title, tags, created, updated).
+    String values are formatted directly; anything else goes through
+    generate_yaml_front_matter. Timestamps are nanoseconds since the epoch
+    (as held by Note) or strings, and are written as ISO 8601.
+    """
+    if _is_ns_timestamp(created):
+        created = format_timestamp_iso(created)
+    if _is_ns_timestamp(updated):
+        updated = format_timestamp_iso(updated)
+    if isinstance(tags, (list, tuple)):
+        try:
+            head = _title_tags_lines(title, tuple(tags))
+        except TypeError: # Unhashable values from hand-edited front-matter
+            head = _title_tags_lines.__wrapped__(title, tags)
+        created_str, updated_str = _yaml_scalar(created), _yaml_scalar(updated)
+        if head is not None and created_str is not None and updated_str is not None:
+            return f"---\n{head}created: {created_str}\nupdated: {updated_str}\n---\n"
+    if isinstance(tags, tuple):
+        tags = list(tags)
+    return generate_yaml_front_matter({'title': title, 'tags': tags, 'created': created, 'updated': updated})
+
 # --- Timestamp Utilities ---
-def get_current_timestamp() -> str:
-    """Returns the current time as an ISO 8601 formatted string (UTC)."""
-    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+# Notes hold timestamps as int nanoseconds since the Unix epoch: sorting and comparing them
+# is plain int comparison. Files keep ISO 8601 strings, converted on load and save.
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def _is_ns_timestamp(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def get_current_timestamp() -> int:
+    """
+    Returns the current time in nanoseconds since the epoch, truncated to
+    microseconds so it survives the round trip through the ISO form on disk.
+    """
+    return time.time_ns() // 1000 * 1000
+
+def timestamp_ns(value) -> int | None:
+    """
+    Converts a timestamp as found in front-matter (ISO 8601 string, or the
+    datetime/date YAML reads unquoted timestamps as) to nanoseconds since the
+    epoch. Naive times are taken as local time, as format_timestamp_display
+    shows them. Returns None if it can't be read.
+    """
+    if _is_ns_timestamp(value):
+        return value
+    if isinstance(value, str):
+        value = parse_timestamp(value)
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        try:
+            value = value.astimezone(timezone.utc) # Naive: local time
+        except (OverflowError, ValueError, OSError): # Outside the platform's local time range
+            return None
+    delta = value - _EPOCH # Exact integer arithmetic, unlike timestamp() * 1e9
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+
+def _datetime_from_ns(ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=ns // 1000)
 
+def format_timestamp_iso(ns: int) -> str:
+    """Formats nanoseconds since the epoch as ISO 8601 (UTC), with microseconds only if it has any."""
+    dt_obj = _datetime_from_ns(ns)
+    return dt_obj.isoformat(timespec='microseconds' if dt_obj.microsecond else 'seconds')
+
+@functools.lru_cache(maxsize=4096)
 def parse_timestamp(ts_str: str) -> datetime | None:
-    """Parses an ISO 8601 timestamp string into a datetime object."""
+    """
+    Parses an ISO 8601 timestamp string into a datetime object.
+    Memoized: the same timestamps are parsed again for every list refresh.
+    """
     if not ts_str:
         return None
     try:
@@ -69,11 +381,23 @@ def parse_timestamp(ts_str: str) -> datetime | None:
         except ValueError:
             return None # Could not parse
 
-def format_timestamp_display(dt_obj: datetime | str | None) -> str:
-    """Formats a datetime object or ISO string for user-friendly display."""
+def format_timestamp_display(dt_obj: datetime | int | str | None) -> str:
+    """Formats a datetime object, nanosecond timestamp or ISO string for user-friendly display."""
     if isinstance(dt_obj, str):
-        dt_obj = parse_timestamp(dt_obj)
-    
+        return _format_timestamp_str(dt_obj)
+    if _is_ns_timestamp(dt_obj):
+        return _format_timestamp_ns(dt_obj)
+    return _format_datetime(dt_obj)
+
+@functools.lru_cache(maxsize=4096)
+def _format_timestamp_str(ts_str: str) -> str:
+    return _format_datetime(parse_timestamp(ts_str))
+
+@functools.lru_cache(maxsize=4096)
+def _format_timestamp_ns(ns: int) -> str:
+    return _format_datetime(_datetime_from_ns(ns))
+
+def _format_datetime(dt_obj) -> str:
     if not isinstance(dt_obj, datetime):
         return "N/A"
 
@@ -132,8 +456,10 @@ Content."""
 
     # Test Timestamp utilities
     print("\n--- Timestamp Test ---")
-    now_ts_str = get_current_timestamp()
-    print(f"Current Timestamp (ISO): {now_ts_str}")
+    now_ts = get_current_timestamp()
+    now_ts_str = format_timestamp_iso(now_ts)
+    print(f"Current Timestamp (ns): {now_ts}, as ISO: {now_ts_str}")
+    print(f"Back to ns: {timestamp_ns(now_ts_str)}")
 
     parsed_dt = parse_timestamp(now_ts_str)
     print(f"Parsed Timestamp (datetime object): {parsed_dt}")
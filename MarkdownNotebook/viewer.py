@@ -3,16 +3,26 @@ Renders Markdown to styled HTML in a Qt WebView or similar widget.
 Handles syntax highlighting for code blocks.
 Ensures HTML sanitization.
 """
+import hashlib
+import html
+import functools
+import json
+import re
+from collections import OrderedDict
 import markdown
 from pygments.formatters import HtmlFormatter
-# For sanitization, 'bleach' is a good option, but not in initial requirements.
-# import bleach
+try: # Optional: libxml2-backed sanitizer (lxml < 5.2, or lxml with lxml_html_clean)
+    from lxml.html.clean import Cleaner
+    from lxml.html.defs import safe_attrs as _LXML_SAFE_ATTRS
+    from lxml.etree import ParserError as _LxmlParserError
+except ImportError:
+    Cleaner = None
 
 # PyQt6 specific imports
 from PyQt6.QtWidgets import QWidget
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWebEngineCore import QWebEngineSettings # For controlling features
-from PyQt6.QtCore import QUrl, Qt
+from PyQt6.QtWebEngineCore import QWebEngineSettings, QWebEngineScript # For controlling features
+from PyQt6.QtCore import QByteArray, QUrl, Qt, QTimer
 
 # Base CSS for styling the HTML view
 BASE_CSS_LIGHT = """
@@ -137,6 +147,101 @@ a { color: #6c9ecf; }
 a:visited { color: #8e88df; }
 """
 
+@functools.lru_cache(maxsize=8)
+def _pygments_css(style_name: str) -> str:
+    """Generates CSS for Pygments syntax highlighting. Memoized: a pure function of the style."""
+    try:
+        formatter = HtmlFormatter(style=style_name, noclasses=False)
+        return formatter.get_style_defs('.codehilite') # .codehilite is used by 'fenced_code' and 'codehilite' exts
+    except Exception as e:
+        print(f"Error getting Pygments style '{style_name}': {e}")
+        return "" # Fallback to no Pygments styling
+
+_BODY_PLACEHOLDER = "{BODY}"
+
+@functools.lru_cache(maxsize=8)
+def _html_shell(base_css: str, pygments_style: str) -> tuple[str, str]:
+    """
+    The page around the rendered body, as (head, tail): everything up to and after the
+    body content. Built once per theme, so a render only concatenates the body in.
+    """
+    shell = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                {base_css}
+                {_pygments_css(pygments_style)}
+            </style>
+        </head>
+        <body>
+            <div id="content">{_BODY_PLACEHOLDER}</div>
+        </body>
+        </html>
+        """
+    head, _, tail = shell.partition(_BODY_PLACEHOLDER)
+    return head, tail
+
+@functools.lru_cache(maxsize=8)
+def _html_shell_bytes(base_css: str, pygments_style: str) -> tuple[bytes, bytes]:
+    """_html_shell() encoded as UTF-8, for loading with setContent() without a re-encode."""
+    head, tail = _html_shell(base_css, pygments_style)
+    return head.encode('utf-8'), tail.encode('utf-8')
+
+# Built at import, so the first preview doesn't pay for them (or the Pygments CSS) either
+_SHELL_LIGHT = _html_shell_bytes(BASE_CSS_LIGHT, "default")
+_SHELL_DARK = _html_shell_bytes(BASE_CSS_DARK, "monokai")
+
+# Swaps the body of the already loaded page; returns false if the page isn't the preview shell
+# (e.g. after following a link), so the caller can load the shell again.
+_SET_CONTENT_JS = ("(function() {{ var content = document.getElementById('content');"
+                   " if (!content) return false; content.innerHTML = {}; return true; }})()")
+# Runs isolated from the page's own scripts, so it works with JavaScript disabled for the content
+_CONTENT_SCRIPT_WORLD = QWebEngineScript.ScriptWorldId.ApplicationWorld.value
+
+PREVIEW_DEBOUNCE_MS = 150 # queue_markdown() renders once edits pause for this long
+BLOCK_CACHE_SIZE = 4096 # Rendered top-level blocks kept per viewer
+_BLOCK_SEPARATOR_RE = re.compile(r"\n(?:[ \t]*\n)+") # Blank lines, including whitespace-only ones
+# Constructs that can tie blocks separated by blank lines together, so blocks can't be converted
+# on their own: lists, indented/fenced code, blockquotes, reference/footnote/abbreviation
+# definitions, definition lists and HTML blocks, plus footnote references anywhere
+_CROSS_BLOCK_RE = re.compile(r"^(?: {4}|\t| {0,3}(?:[-*+]|\d+[.)])(?:[ \t]|$)| {0,3}(?:```|~~~)| {0,3}\[[^\]]*\]:"
+                             r"| {0,3}\*\[| {0,3}:[ \t]| {0,3}[<>])|\[\^", re.MULTILINE)
+_CODE_BLOCK_RE = re.compile(r"^(?: {4}|\t| {0,3}(?:```|~~~))", re.MULTILINE) # Where codehilite has work to do
+# Tags kept by the sanitizer; everything Python-Markdown and its extensions emit
+ALLOWED_TAGS = frozenset({
+    'p', 'br', 'hr', 'div', 'span', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'pre', 'code', 'kbd', 'samp', 'var', 'em', 'strong', 'b', 'i', 'u',
+    's', 'del', 'ins', 'mark', 'small', 'sub', 'sup', 'abbr', 'a', 'img',
+    'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'table', 'caption', 'colgroup', 'col',
+    'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'details', 'summary', 'figure', 'figcaption',
+})
+
+RENDER_CACHE_SIZE = 128 # Rendered bodies kept per viewer (revisited notes, undo, theme toggles)
+_RENDER_CACHE_KEY_MAX = 64 * 1024 # Longer texts are keyed by a digest rather than kept as keys
+
+def create_cleaner():
+    """The allow-list sanitizer for rendered HTML, or None if lxml's Cleaner isn't installed."""
+    if Cleaner is None:
+        return None
+    return Cleaner(scripts=True, javascript=True, embedded=True, frames=True,
+                   forms=False, safe_attrs_only=True,
+                   # Tables put column alignment in style="text-align: ..."; the
+                   # Cleaner still strips javascript:/expression() from style values
+                   safe_attrs=_LXML_SAFE_ATTRS | {'style'},
+                   allow_tags=ALLOWED_TAGS, remove_unknown_tags=False)
+
+def sanitize_html(cleaner, html_output: str) -> str:
+    """Runs rendered HTML through the cleaner; never passes unsanitized HTML on."""
+    try:
+        return cleaner.clean_html(html_output)
+    except _LxmlParserError: # No elements at all, e.g. only a comment: nothing to display
+        return ""
+    except Exception as e:
+        print(f"Error sanitizing rendered HTML: {e}")
+        return f"<pre>{html.escape(html_output)}</pre>"
+
 class MarkdownViewer(QWebEngineView):
     def __init__(self, parent: QWidget = None):
         super().__init__(parent)
@@ -144,6 +249,32 @@ class MarkdownViewer(QWebEngineView):
         self.current_theme = "light" # "light" or "dark"
         self.pygments_style = "default" # Pygments style for light theme
         self.pygments_style_dark = "monokai" # Pygments style for dark theme
+        # Markdown text -> body HTML, least recently used first. The body doesn't depend on the
+        # theme: codehilite emits CSS classes, and the theme's styles are added by _wrap_html_content.
+        self._html_cache = OrderedDict()
+        # Built once; reset() between documents. Notes without code blocks (most of them)
+        # skip the Pygments-based codehilite pass entirely.
+        self._md = self._create_markdown()
+        self._md_fast = self._create_markdown(highlight_code=False)
+        # Top-level block text -> its HTML: after an edit, only the changed block is converted
+        self._block_cache = OrderedDict()
+        # Allow-list sanitizer for rendered HTML (raw HTML in notes passes through Markdown)
+        self._cleaner = create_cleaner()
+        self._last_md = None # Last text passed to set_markdown, re-rendered by set_theme
+        # Live-preview updates are coalesced: a burst of queue_markdown() calls renders once
+        self._pending_md = None
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(PREVIEW_DEBOUNCE_MS)
+        self._debounce.timeout.connect(self.flush)
+        # Once the page shell for a theme is loaded, renders only replace its content element
+        # instead of reloading the whole page (and losing the scroll position)
+        self._shell_key = None # Theme styles and base URL of the loaded (or loading) shell
+        self._page_ready = False
+        self._deferred_body = None # Body rendered while the shell was still loading
+        # Relative links and images in a note resolve against this, see set_base_url()
+        self._base_url = QUrl("about:blank")
+        self.loadFinished.connect(self._on_load_finished)
 
         # Configure WebEngine settings for security and functionality
         settings = self.settings()
@@ -152,94 +283,180 @@ class MarkdownViewer(QWebEngineView):
         settings.setAttribute(QWebEngineSettings.WebAttribute.PluginsEnabled, False)
         settings.setAttribute(QWebEngineSettings.WebAttribute.ScrollAnimatorEnabled, True) # Smooth scrolling
 
-        self.setHtml(self._wrap_html_content("<h1>Markdown Notebook</h1><p>Preview will appear here.</p>"))
-
-    def _get_pygments_css(self, style_name: str) -> str:
-        """Generates CSS for Pygments syntax highlighting."""
-        try:
-            formatter = HtmlFormatter(style=style_name, noclasses=False)
-            return formatter.get_style_defs('.codehilite') # .codehilite is used by 'fenced_code' and 'codehilite' exts
-        except Exception as e:
-            print(f"Error getting Pygments style '{style_name}': {e}")
-            return "" # Fallback to no Pygments styling
+        self._show_body("<h1>Markdown Notebook</h1><p>Preview will appear here.</p>")
 
     def _wrap_html_content(self, html_content: str, is_dark_theme: bool = False) -> str:
         """Wraps the given HTML content with base CSS and Pygments CSS."""
-        base_css = BASE_CSS_DARK if is_dark_theme else BASE_CSS_LIGHT
-        pygments_css = self._get_pygments_css(self.pygments_style_dark if is_dark_theme else self.pygments_style)
+        if is_dark_theme:
+            head, tail = _html_shell(BASE_CSS_DARK, self.pygments_style_dark)
+        else:
+            head, tail = _html_shell(BASE_CSS_LIGHT, self.pygments_style)
+        return head + html_content + tail
 
-        full_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                {base_css}
-                {pygments_css}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
+    def _wrap_html_bytes(self, html_content: str, is_dark_theme: bool = False) -> bytes:
+        """Like _wrap_html_content, as UTF-8 bytes: only the body needs encoding."""
+        if is_dark_theme:
+            head, tail = _html_shell_bytes(BASE_CSS_DARK, self.pygments_style_dark)
+        else:
+            head, tail = _html_shell_bytes(BASE_CSS_LIGHT, self.pygments_style)
+        return b"".join((head, html_content.encode('utf-8'), tail))
+
+    @staticmethod
+    def _create_markdown(highlight_code: bool = True) -> markdown.Markdown:
+        """
+        Builds a Markdown converter. Without highlight_code, codehilite is left out:
+        it only touches code blocks, so for documents without any the output is the same.
         """
-        return full_html
+        # Markdown extensions:
+        # - fenced_code: for ```python ... ``` style code blocks
+        # - codehilite: for syntax highlighting (requires Pygments)
+        # - tables: for Markdown tables
+        # - toc: for table of contents (optional, might need specific styling)
+        # - nl2br: for converting newlines to <br> (GitHub-style)
+        extensions = [
+            'fenced_code',
+            'codehilite', # Note: codehilite needs `css_class='codehilite'` usually
+            'tables',
+            'nl2br',
+            'extra' # Includes abbreviations, attribute lists, def lists, footnotes, etc.
+        ]
+        if not highlight_code:
+            extensions.remove('codehilite')
+            return markdown.Markdown(extensions=extensions)
+        extension_configs = {
+            'codehilite': {
+                'css_class': 'codehilite',  # Class for Pygments CSS
+                'linenums': False,          # Show line numbers
+                # No lexer guessing: trying every Pygments lexer on each unlabelled block is
+                # slow on code-heavy notes. Only blocks that name a language (```python) are
+                # highlighted; the others are shown as plain preformatted text.
+                'guess_lang': False,
+            }
+        }
+        return markdown.Markdown(extensions=extensions, extension_configs=extension_configs)
 
-    def set_markdown(self, md_text: str):
-        """Converts Markdown to HTML and displays it."""
+    def _render_md_to_html(self, md_text: str) -> str:
+        """Converts Markdown to body HTML (no CSS), memoized per text."""
+        key = md_text if len(md_text) <= _RENDER_CACHE_KEY_MAX else \
+            hashlib.blake2b(md_text.encode('utf-8'), digest_size=16).digest()
+        html_output = self._html_cache.get(key)
+        if html_output is not None:
+            self._html_cache.move_to_end(key)
+            return html_output
         try:
-            # Markdown extensions:
-            # - fenced_code: for ```python ... ``` style code blocks
-            # - codehilite: for syntax highlighting (requires Pygments)
-            # - tables: for Markdown tables
-            # - toc: for table of contents (optional, might need specific styling)
-            # - nl2br: for converting newlines to <br> (GitHub-style)
-            extensions = [
-                'fenced_code',
-                'codehilite', # Note: codehilite needs `css_class='codehilite'` usually
-                'tables',
-                'nl2br',
-                'extra' # Includes abbreviations, attribute lists, def lists, footnotes, etc.
-            ]
-            extension_configs = {
-                'codehilite': {
-                    'css_class': 'codehilite',  # Class for Pygments CSS
-                    'linenums': False,          # Show line numbers
-                    'guess_lang': True,
-                    'pygments_style': self.pygments_style_dark if self.current_theme == "dark" else self.pygments_style,
-                }
-            }
-            html_output = markdown.markdown(md_text, extensions=extensions, extension_configs=extension_configs)
+            html_output = self._convert(md_text)
+        except Exception as e:
+            return f"<p>Error rendering Markdown: {e}</p><pre>{md_text}</pre>" # Not cached: may be transient
+        # Defense in depth on top of the disabled JS; only cache misses get here
+        if self._cleaner is not None and html_output:
+            html_output = sanitize_html(self._cleaner, html_output)
 
-            # Basic sanitization (consider using 'bleach' for more robust sanitization)
-            # For now, we rely on QWebEngineView's sandboxing and disabled JS.
-            # html_output = bleach.clean(html_output, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
+        self._html_cache[key] = html_output
+        if len(self._html_cache) > RENDER_CACHE_SIZE:
+            self._html_cache.popitem(last=False)
+        return html_output
 
-        except Exception as e:
-            html_output = f"<p>Error rendering Markdown: {e}</p><pre>{md_text}</pre>"
+    def _convert(self, md_text: str) -> str:
+        """
+        Converts a document block by block (blocks are separated by blank lines),
+        reusing cached blocks. Documents using constructs that span blocks are
+        converted as a whole, so the output is always that of a full conversion.
+        """
+        if _CROSS_BLOCK_RE.search(md_text):
+            parser = self._md if _CODE_BLOCK_RE.search(md_text) else self._md_fast
+            return parser.reset().convert(md_text)
+        cache = self._block_cache
+        parts = []
+        for block in _BLOCK_SEPARATOR_RE.split(md_text):
+            if not block.strip():
+                continue
+            html_block = cache.get(block)
+            if html_block is None:
+                html_block = self._md_fast.reset().convert(block) # Code blocks never get here
+                cache[block] = html_block
+                if len(cache) > BLOCK_CACHE_SIZE:
+                    cache.popitem(last=False)
+            else:
+                cache.move_to_end(block)
+            parts.append(html_block)
+        return "\n".join(parts)
 
-        full_html = self._wrap_html_content(html_output, self.current_theme == "dark")
-        self.setHtml(full_html, QUrl("qrc:///")) # Use qrc scheme or about:blank for base URL
+    def render_full_html(self, md_text: str, is_dark_theme: bool = False) -> str:
+        """Returns the complete, styled HTML page for md_text (used for export)."""
+        return self._wrap_html_content(self._render_md_to_html(md_text), is_dark_theme)
 
-    def set_theme(self, theme: str): # "light" or "dark"
-        """Sets the theme for the viewer."""
-        if theme in ["light", "dark"]:
-            self.current_theme = theme
-            # Re-render current content with new theme
-            current_page_html = self.page().toHtml(lambda html: self._update_theme_in_html(html, theme == "dark"))
+    def queue_markdown(self, md_text: str):
+        """
+        Displays md_text once calls stop arriving for PREVIEW_DEBOUNCE_MS, e.g. while
+        the user types; only the last text of a burst is rendered.
+        """
+        self._pending_md = md_text
+        self._debounce.start() # Restarted by each call
+
+    def flush(self):
+        """Renders a queued update now, if there is one."""
+        self._debounce.stop()
+        if self._pending_md is not None:
+            self.set_markdown(self._pending_md)
+
+    def set_markdown(self, md_text: str):
+        """Converts Markdown to HTML and displays it immediately (dropping any queued update)."""
+        self._debounce.stop()
+        self._pending_md = None
+        self._last_md = md_text
+        self._show_body(self._render_md_to_html(md_text))
 
+    def _show_body(self, body_html: str):
+        """Displays body HTML, through the loaded shell when its theme still applies."""
+        is_dark = self.current_theme == "dark"
+        shell_key = (is_dark, self.pygments_style_dark if is_dark else self.pygments_style,
+                     self._base_url.toString())
+        if shell_key == self._shell_key:
+            if self._page_ready:
+                self._set_content(body_html)
+            else:
+                self._deferred_body = body_html # Pushed in once the shell has loaded
+            return
+        self._shell_key = shell_key
+        self._page_ready = False
+        self._deferred_body = None
+        # setContent takes the encoded page as is; setHtml would encode the whole page again
+        self.setContent(QByteArray(self._wrap_html_bytes(body_html, is_dark)),
+                        "text/html; charset=utf-8", self._base_url)
 
-    def _update_theme_in_html(self, current_html_body: str, is_dark_theme: bool):
+    def _set_content(self, body_html: str):
+        self.page().runJavaScript(_SET_CONTENT_JS.format(json.dumps(body_html)), _CONTENT_SCRIPT_WORLD,
+                                  self._on_content_set)
+
+    def _on_content_set(self, replaced):
+        if not replaced: # The shell is gone; load it again with the latest content
+            self._shell_key = None
+            if self._last_md is not None:
+                self.set_markdown(self._last_md)
+
+    def _on_load_finished(self, ok: bool):
+        if not ok:
+            self._shell_key = None # Reload the shell on the next render
+            return
+        self._page_ready = True
+        if self._deferred_body is not None:
+            body_html, self._deferred_body = self._deferred_body, None
+            self._set_content(body_html)
+
+    def set_base_url(self, base_url: QUrl):
         """
-        Helper to re-wrap existing HTML body with new theme styles.
-        This is a simplified approach; ideally, you'd re-render from Markdown.
-        For now, this will just reload the last rendered Markdown with the new theme.
+        Sets the URL relative resources are resolved against, e.g. the note's folder
+        (QUrl.fromLocalFile(folder + "/")) so images load from disk and stay in the
+        browser cache. Takes effect on the next set_markdown().
         """
-        # A better way is to store the last markdown and call set_markdown again.
-        # This is a placeholder until that is implemented.
-        # For now, this function is not directly used by set_theme,
-        # set_markdown will be called again by the main application.
-        pass
+        self._base_url = QUrl(base_url)
+
+    def set_theme(self, theme: str): # "light" or "dark"
+        """Sets the theme for the viewer, re-wrapping the current content in its styles."""
+        if theme in ["light", "dark"] and theme != self.current_theme:
+            self.current_theme = theme
+            if self._last_md is not None:
+                self.set_markdown(self._last_md) # Body HTML comes from the cache: no re-parse
 
     def set_font_size_multiplier(self, multiplier: float):
         """ Adjusts the zoom factor of the web view. """
@@ -269,3 +486,9 @@ def greet(name):
     print(f"Hello, {name}!")
 
 greet("Viewer")
+```
+"""
+    viewer.set_markdown(test_markdown)
+    window.resize(800, 600)
+    window.show()
+    sys.exit(app.exec())
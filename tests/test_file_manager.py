@@ -1,13 +1,20 @@
 import unittest
 import os
 import shutil
+import bisect
+import json
+import time
+import yaml
 from datetime import datetime, timezone
 
 # Adjust import path if running tests from project root
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from MarkdownNotebook.file_manager import Note, scan_notes_directory, load_note, save_note, create_new_note, delete_note_file
+from MarkdownNotebook.file_manager import (
+    Note, scan_notes_directory, load_note, load_note_meta, save_note, create_new_note, delete_note_file, NOTES_CACHE_FILENAME,
+    AsyncNoteWriter, set_notes_dir, note_sort_key
+)
 from MarkdownNotebook.utils import get_current_timestamp, parse_yaml_front_matter, generate_yaml_front_matter
 
 TEST_NOTES_DIR = os.path.join(os.path.dirname(__file__), "temp_test_notes")
@@ -48,12 +55,9 @@ class TestFileManager(unittest.TestCase):
         self.assertEqual(note.content.strip(), content.strip())
         self.assertListEqual(sorted(note.tags), sorted(tags))
         
-        # Verify timestamps are recent (within a few seconds)
-        now = datetime.now(timezone.utc)
-        created_dt = datetime.fromisoformat(note.created.replace('Z', '+00:00'))
-        updated_dt = datetime.fromisoformat(note.updated.replace('Z', '+00:00'))
-        self.assertLess((now - created_dt).total_seconds(), 5)
-        self.assertLess((now - updated_dt).total_seconds(), 5)
+        # Verify timestamps (nanoseconds since the epoch) are recent (within a few seconds)
+        self.assertLess(abs(time.time_ns() - note.created), 5e9)
+        self.assertLess(abs(time.time_ns() - note.updated), 5e9)
 
     def test_02_load_note(self):
         # First, create a note manually to load
@@ -75,8 +79,8 @@ class TestFileManager(unittest.TestCase):
         self.assertIsNotNone(loaded_note)
         self.assertEqual(loaded_note.title, title)
         self.assertListEqual(sorted(loaded_note.tags), sorted(tags))
-        self.assertEqual(loaded_note.created, created)
-        self.assertEqual(loaded_note.updated, updated)
+        self.assertEqual(loaded_note.created, int(datetime(2023, 1, 1, 10, tzinfo=timezone.utc).timestamp()) * 10**9)
+        self.assertEqual(loaded_note.updated, int(datetime(2023, 1, 1, 11, tzinfo=timezone.utc).timestamp()) * 10**9)
         self.assertEqual(loaded_note.content.strip(), content_md.strip())
 
     def test_03_save_note(self):
@@ -110,7 +114,7 @@ class TestFileManager(unittest.TestCase):
         meta_updated, content_part_updated = parse_yaml_front_matter(raw_content_updated)
         self.assertEqual(meta_updated.get('title'), "Updated Save Title")
         self.assertIn("modified", meta_updated.get('tags'))
-        self.assertNotEqual(meta_updated.get('updated'), now_ts) # Timestamp should have changed
+        self.assertNotEqual(meta_updated.get('updated'), meta.get('updated')) # Timestamp should have changed
         self.assertEqual(content_part_updated.strip(), "Updated content.")
 
     def test_04_scan_notes_directory(self):
@@ -173,5 +177,197 @@ class TestFileManager(unittest.TestCase):
         # Filename should be different, e.g., duplicate_title_slug_test_1.md
         self.assertRegex(os.path.basename(note2.filepath), r"duplicate_title_slug_test_\d+\.md")
 
+    def test_09_scan_uses_metadata_cache(self):
+        filepath = os.path.join(TEST_NOTES_DIR, "cached.md")
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("---\ntitle: Cached Title\ntags: [cache]\n---\nCached body.")
+
+        first_scan = scan_notes_directory(TEST_NOTES_DIR)
+        self.assertTrue(os.path.exists(os.path.join(TEST_NOTES_DIR, NOTES_CACHE_FILENAME)))
+
+        # Second scan is served from the cache; content is read on demand
+        second_scan = scan_notes_directory(TEST_NOTES_DIR)
+        self.assertEqual(len(second_scan), 1)
+        self.assertEqual(second_scan[0].title, first_scan[0].title)
+        self.assertListEqual(second_scan[0].tags, ["cache"])
+        self.assertEqual(second_scan[0].content.strip(), "Cached body.")
+
+        # A modified file (different size) must be re-parsed
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("---\ntitle: Changed Title\n---\nChanged body, now longer.")
+        third_scan = scan_notes_directory(TEST_NOTES_DIR)
+        self.assertEqual(third_scan[0].title, "Changed Title")
+
+    def test_10_load_note_meta_reads_content_lazily(self):
+        filepath = os.path.join(TEST_NOTES_DIR, "meta_only.md")
+        body = "Line of body text.\n" * 1000 # Larger than a single header read
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(f"---\ntitle: Meta Only\ntags: [lazy]\n---\n{body}")
+
+        note = load_note_meta(filepath)
+        self.assertIsNotNone(note)
+        self.assertEqual(note.title, "Meta Only")
+        self.assertListEqual(note.tags, ["lazy"])
+        self.assertEqual(note.content, body)
+
+    def test_11_async_note_writer_coalesces_saves(self):
+        filepath = os.path.join(TEST_NOTES_DIR, "async_save.md")
+        now_ts = get_current_timestamp()
+        note = Note(filepath, title="Async Save", tags=["async"], created=now_ts, updated=now_ts, content="v1")
+
+        writer = AsyncNoteWriter()
+        try:
+            for version in ("v1", "v2", "v3"):
+                note.content = version
+                writer.enqueue(note)
+            self.assertTrue(writer.flush(timeout=5))
+        finally:
+            writer.close()
+
+        loaded_note = load_note(filepath)
+        self.assertEqual(loaded_note.title, "Async Save")
+        self.assertEqual(loaded_note.content.strip(), "v3")
+
+    def test_12_save_note_round_trips_special_characters(self):
+        filepath = os.path.join(TEST_NOTES_DIR, "special.md")
+        now_ts = get_current_timestamp()
+        title = "Re: it's #1 [draft]"
+        tags = ["c++", "yes", "two words", "Café"]
+        note = Note(filepath, title=title, tags=tags, created=now_ts, updated=now_ts, content="Body.")
+        self.assertTrue(save_note(note))
+
+        loaded_note = load_note(filepath)
+        self.assertEqual(loaded_note.title, title)
+        self.assertListEqual(loaded_note.tags, tags)
+        self.assertEqual(loaded_note.created, now_ts)
+        self.assertEqual(loaded_note.content.strip(), "Body.")
+
+    def test_13_notes_dir_handle(self):
+        set_notes_dir(TEST_NOTES_DIR)
+        try:
+            note = create_new_note(TEST_NOTES_DIR, "Dir Handle Note", tags=["fd"], content="Via dir fd.")
+            self.assertIsNotNone(note)
+            note.content = "Saved via dir fd."
+            self.assertTrue(save_note(note))
+            self.assertEqual(load_note(note.filepath).content.strip(), "Saved via dir fd.")
+            self.assertEqual(load_note_meta(note.filepath).title, "Dir Handle Note")
+        finally:
+            set_notes_dir(None)
+
+    def test_14_notes_order_newest_first(self):
+        old = Note("/n/old.md", updated="2023-01-01T00:00:00+00:00")
+        mid = Note("/n/mid.md", created="2023-06-01T00:00:00+00:00")
+        new = Note("/n/new.md", updated="2024-01-01T00:00:00+00:00")
+        notes = sorted([old, new], key=note_sort_key, reverse=True)
+        bisect.insort(notes, mid)
+        self.assertListEqual(notes, [new, mid, old])
+        self.assertListEqual(sorted([mid, old, new]), [new, mid, old])
+
+    def test_15_simple_front_matter_matches_yaml(self):
+        headers = [
+            "title: 'Re: it''s #1'\ntags: ['c++', two words, 'Café']\ncreated: '2024-01-01T00:00:00+00:00'\n",
+            "title: Plain Title\ntags:\n  - one\n  - 'yes'\n",
+            "title: yes\ntags: []\n", # Not a string: must come back as YAML reads it
+            "title: Dated\ncreated: 2023-01-01T10:00:00Z\n", # A datetime, via YAML
+            "title: Commented # note\ncount: 3\n",
+            'title: "Quoted: \\"escapes\\" \\/ \\\\"\ntags: ["a, b", \'c\', d]\n',
+            'title: "Hex \\x41"\n', # A YAML-only escape, via YAML
+        ]
+        for header in headers:
+            for data in (f"---\n{header}---\nBody.\n", f"---\n{header}---\nBody.\n".encode('utf-8')):
+                meta, content = parse_yaml_front_matter(data)
+                self.assertEqual(meta, yaml.safe_load(header))
+                self.assertEqual(content, "Body.\n")
+
+    def test_16_cached_front_matter_is_copied(self):
+        data = b"---\ntitle: Cached\ntags: [one, two]\n---\nBody.\n"
+        meta, _ = parse_yaml_front_matter(data)
+        meta['tags'].append("three") # e.g. Note.add_tag on a loaded note
+        meta['title'] = "Changed"
+        meta_again, _ = parse_yaml_front_matter(data)
+        self.assertEqual(meta_again, {'title': "Cached", 'tags': ["one", "two"]})
+
+    def test_17_load_large_note_via_mmap(self):
+        from MarkdownNotebook import file_manager
+        body = "Große Notiz.\n" * 100000 # Over _MMAP_MIN_SIZE once encoded
+        with_header = os.path.join(TEST_NOTES_DIR, "large.md")
+        without_header = os.path.join(TEST_NOTES_DIR, "large_plain.md")
+        with open(with_header, 'w', encoding='utf-8') as f:
+            f.write(f"---\ntitle: Large\ntags: [big]\n---\n{body}")
+        with open(without_header, 'w', encoding='utf-8') as f:
+            f.write(body)
+        self.assertGreaterEqual(os.path.getsize(without_header), file_manager._MMAP_MIN_SIZE)
+
+        note = load_note(with_header)
+        self.assertEqual((note.title, note.tags, note.content), ("Large", ["big"], body))
+        self.assertEqual(load_note(without_header).content, body)
+
+    def test_18_timestamps_round_trip_as_nanoseconds(self):
+        from datetime import date
+        from MarkdownNotebook.utils import timestamp_ns, format_timestamp_iso
+        noon = int(datetime(2024, 7, 15, 12, tzinfo=timezone.utc).timestamp()) * 10**9
+        for value in ("2024-07-15T12:00:00Z", "2024-07-15T14:00:00+02:00",
+                      datetime(2024, 7, 15, 12, tzinfo=timezone.utc), noon):
+            self.assertEqual(timestamp_ns(value), noon)
+        # Naive values are local time
+        local_noon = int(datetime(2024, 7, 15, 12).timestamp()) * 10**9
+        self.assertEqual(timestamp_ns("2024-07-15T12:00:00"), local_noon)
+        self.assertEqual(timestamp_ns(date(2024, 7, 15)), local_noon - 12 * 3600 * 10**9)
+        self.assertIsNone(timestamp_ns("not-a-date"))
+        self.assertEqual(format_timestamp_iso(noon), "2024-07-15T12:00:00+00:00")
+        now = get_current_timestamp()
+        self.assertEqual(timestamp_ns(format_timestamp_iso(now)), now)
+
+    def test_19_front_matter_memo_survives_timestamp_updates(self):
+        from MarkdownNotebook.utils import _title_tags_lines
+        note = create_new_note(TEST_NOTES_DIR, "Memo Note", tags=["memo"], content="v0")
+        hits = _title_tags_lines.cache_info().hits
+        for i in range(3): # What save_current_note does: new content, new updated timestamp
+            note.content = f"v{i + 1}"
+            note.updated = get_current_timestamp()
+            self.assertTrue(save_note(note))
+        self.assertEqual(_title_tags_lines.cache_info().hits - hits, 3)
+        self.assertEqual(load_note(note.filepath).updated, note.updated)
+
+    def test_20_hand_written_timestamps_survive_a_save(self):
+        from MarkdownNotebook.utils import format_timestamp_display
+        filepath = os.path.join(TEST_NOTES_DIR, "hand_written.md")
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("---\ntitle: Hand Written\ncreated: yesterday\nupdated: 2024-07-15T08:30:00\n---\nBody.")
+
+        note = load_note(filepath)
+        self.assertEqual(note.created, "yesterday") # Unreadable: kept as written
+        self.assertEqual(format_timestamp_display(note.updated), "2024-07-15 08:30") # Naive: local time
+        self.assertTrue(save_note(note))
+
+        with open(filepath, 'r', encoding='utf-8') as f:
+            metadata, _ = parse_yaml_front_matter(f.read())
+        self.assertEqual(metadata['created'], "yesterday")
+        reloaded = load_note(filepath)
+        self.assertEqual(reloaded.updated, note.updated)
+        self.assertEqual(format_timestamp_display(reloaded.updated), "2024-07-15 08:30")
+        # Sorts (as 0) alongside notes with readable timestamps
+        self.assertEqual(sorted([reloaded, create_new_note(TEST_NOTES_DIR, "Newer")])[0].title, "Newer")
+
+    def test_21_malformed_cache_entries_are_reparsed(self):
+        for i in range(5):
+            create_new_note(TEST_NOTES_DIR, f"Cached {i}", tags=["cache"], content=f"body {i}")
+        scan_notes_directory(TEST_NOTES_DIR)
+        cache_path = os.path.join(TEST_NOTES_DIR, NOTES_CACHE_FILENAME)
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        names = sorted(data['entries'])
+        mtime_ns, size = data['entries'][names[0]][:2]
+        bad_entries = [{"title": "x"}, [mtime_ns, size, "Short"], [str(mtime_ns), size, "T", [], 0, 0],
+                       [mtime_ns, size, "T", "not-a-list", 0, 0], None]
+        for name, bad in zip(names, bad_entries):
+            data['entries'][name] = bad
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+        notes = scan_notes_directory(TEST_NOTES_DIR)
+        self.assertListEqual([note.title for note in notes], [f"Cached {i}" for i in range(5)])
+        self.assertTrue(all(note.tags == ["cache"] for note in notes))
+
 if __name__ == '__main__':
     unittest.main()
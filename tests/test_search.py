@@ -1,6 +1,7 @@
 import unittest
 import os
 import sys
+import threading
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from MarkdownNotebook.file_manager import Note
@@ -108,6 +109,17 @@ class TestSearch(unittest.TestCase):
              "project", "ideas", "planning"]
         )))
         self.assertListEqual(all_tags, expected_tags)
+
+    def test_get_all_tags_tracks_removals(self):
+        index = SearchIndex()
+        a = Note(filepath="/test/a.md", title="A", tags=["Shared", "only-a"], content="")
+        b = Note(filepath="/test/b.md", title="B", tags=["Shared"], content="")
+        index.build_index([a, b])
+        self.assertListEqual(index.get_all_tags(), ["Shared", "only-a"])
+        index.remove("/test/a.md")
+        self.assertListEqual(index.get_all_tags(), ["Shared"])
+        index.remove("/test/b.md")
+        self.assertListEqual(index.get_all_tags(), [])
         
     def test_search_empty_content_note(self):
         # Search for something that won't be in the empty note
@@ -118,5 +130,106 @@ class TestSearch(unittest.TestCase):
         # Ensure empty note itself isn't found by content search for specific terms
         # (unless the term is somehow in its title or tags)
 
+    def test_search_partial_words_and_punctuation(self):
+        results = self.search_index.search("garde")
+        self.assertEqual([r.title for r in results], ["Gardening Tips for Roses"])
+        self.assertEqual(len(self.search_index.search("pyth web")), 1) # Every word term matches as a prefix
+        self.assertEqual(len(self.search_index.search("ardening")), 0) # ... but not inside a word
+
+        results_punct = self.search_index.search("ingredients: tomatoes,")
+        self.assertEqual([r.title for r in results_punct], ["Healthy Tomato Soup Recipe"])
+
+    def test_search_case_folds_non_ascii(self):
+        index = SearchIndex()
+        index.build_index([Note(filepath="/test/street.md", title="Große Straße", tags=["Café"],
+                                created=get_current_timestamp(), updated=get_current_timestamp(),
+                                content="ΟΔΟΣ near the corner.")])
+        self.assertEqual(len(index.search("strasse")), 1)
+        self.assertEqual(len(index.search("οδοσ")), 1) # Final sigma folds to sigma
+        self.assertEqual(len(index.filter_by_tag("CAFÉ")), 1)
+
+    def test_search_paths_and_filter_by_tag_paths(self):
+        self.assertSetEqual(self.search_index.search_paths("python"), {"/test/note2.md", "/test/note4.md"})
+        self.assertSetEqual(self.search_index.filter_by_tag_paths("python"), {"/test/note2.md", "/test/note4.md"})
+        self.assertEqual(len(self.search_index.search_paths("")), len(self.notes))
+        self.assertSetEqual(self.search_index.filter_by_tag_paths("nonexistent_tag"), set())
+
+    def test_incremental_add_update_remove(self):
+        index = SearchIndex()
+        index.build_index(self.notes[:2])
+        new_note = Note(filepath="/test/new.md", title="Bird Watching", tags=["birds"],
+                        created=get_current_timestamp(), updated=get_current_timestamp(),
+                        content="Binoculars and patience.")
+        index.add(new_note)
+        self.assertEqual([n.filepath for n in index.search("binoculars")], ["/test/new.md"])
+        self.assertIn("birds", index.get_all_tags())
+
+        new_note.content = "Field guide and a notebook."
+        index.update(new_note)
+        self.assertEqual(len(index.search("binoculars")), 0)
+        self.assertEqual(len(index.search("field guide")), 1)
+        self.assertEqual(len(index.search("")), 3) # Updated in place, not duplicated
+
+        self.assertTrue(index.remove("/test/new.md"))
+        self.assertFalse(index.remove("/test/new.md"))
+        self.assertEqual(len(index.search("field guide")), 0)
+        self.assertNotIn("birds", index.get_all_tags())
+        self.assertNotIn("guide", index.content_idx) # Postings dropped, not left empty
+        self.assertNotIn("/test/new.md", index.note_tokens)
+
+    def test_build_index_keeps_one_entry_per_filepath(self):
+        index = SearchIndex()
+        duplicate = Note(filepath=self.notes[0].filepath, title="Python Duplicate", tags=[],
+                         created=get_current_timestamp(), updated=get_current_timestamp(), content="")
+        index.build_index(self.notes + [duplicate])
+        self.assertEqual(len(index.search("")), len(self.notes))
+        self.assertEqual([n.title for n in index.search("duplicate")], ["Python Duplicate"])
+
+    def test_search_results_cached_until_index_changes(self):
+        index = SearchIndex()
+        index.build_index(self.notes)
+        first = index.search_paths("python")
+        first.clear() # Callers get their own copy of the cached result
+        self.assertEqual(index.search_paths("Python"), index.search_paths("python"))
+        self.assertEqual(len(index.search_paths("python")), 2)
+        self.assertGreater(index._cached_matches.cache_info().hits, 0)
+
+        note = self.notes[0]
+        index.update(Note(filepath=note.filepath, title="Python in the Garden", tags=note.tags,
+                          created=note.created, updated=note.updated, content=note.content))
+        self.assertEqual(len(index.search_paths("python")), 3)
+
+    def test_search_paths_while_index_changes(self):
+        index = SearchIndex()
+        index.build_index(self.notes)
+        errors = []
+        stop = threading.Event()
+
+        def search_loop(): # What FilterJob does on the thread pool
+            while not stop.is_set():
+                try:
+                    index.search_paths("python churn")
+                    index.search_paths("churn notes-x") # Word terms, then a substring scan of their matches
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6) # Switch threads often, so an unguarded race shows up
+        worker = threading.Thread(target=search_loop)
+        worker.start()
+        try:
+            for i in range(300): # What auto-saves and directory syncs do on the GUI thread
+                note = Note(filepath=f"/test/churn{i % 7}.md", title=f"Python churn {i}", tags=["churn"],
+                            created=get_current_timestamp(), updated=get_current_timestamp(), content="notes-x " * i)
+                index.update(note)
+                if i % 3 == 0:
+                    index.remove(note.filepath)
+        finally:
+            stop.set()
+            worker.join()
+            sys.setswitchinterval(switch_interval)
+        self.assertListEqual(errors, [])
+
 if __name__ == '__main__':
     unittest.main()
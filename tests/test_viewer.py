@@ -0,0 +1,38 @@
+import unittest
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from MarkdownNotebook.viewer import MarkdownViewer, create_cleaner, sanitize_html
+except ImportError: # PyQt6 WebEngine not available
+    create_cleaner = None
+
+@unittest.skipIf(create_cleaner is None or create_cleaner() is None, "needs PyQt6 WebEngine and lxml's Cleaner")
+class TestSanitizer(unittest.TestCase):
+
+    def setUp(self):
+        self.cleaner = create_cleaner()
+        self.md = MarkdownViewer._create_markdown()
+
+    def test_aligned_table_keeps_alignment(self):
+        rendered = self.md.reset().convert("| Left | Right |\n|:-----|------:|\n| a | b |\n")
+        cleaned = sanitize_html(self.cleaner, rendered)
+        self.assertIn('style="text-align: left;"', cleaned)
+        self.assertIn('style="text-align: right;"', cleaned)
+
+    def test_scripts_and_handlers_removed(self):
+        cleaned = sanitize_html(self.cleaner, '<p onclick="x()">Hi<script>alert(1)</script>'
+                                              '<a href="javascript:alert(1)">link</a></p>')
+        self.assertNotIn("script", cleaned)
+        self.assertNotIn("onclick", cleaned)
+        self.assertIn("Hi", cleaned)
+
+    def test_comment_only_output_is_not_an_error(self):
+        rendered = self.md.reset().convert("<!-- No note selected or content empty -->")
+        cleaned = sanitize_html(self.cleaner, rendered)
+        self.assertNotIn("Error", cleaned)
+        self.assertNotIn("No note selected", cleaned)
+
+if __name__ == '__main__':
+    unittest.main()